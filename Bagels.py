@@ -21,10 +21,16 @@ secret number.
 Tags: short,game,puzzle
 
 """
+import functools
+import itertools
 import random
+from array import array
 
 NUM_DIGITS = 3
 MAX_GUESSES = 10
+ALPHABET = '123456789'  # The digits a secret number is made from (at least NUM_DIGITS of them)
+ALPHABET_SET = set(ALPHABET)
+MASK_CACHE_SIZE = 1 << 16   # How many numbers getMasks() remembers
 
 
 def main():
@@ -83,18 +89,106 @@ def main():
 
 
 
-def getSecretNum():
-    """ Returns a string made up of NUM_DIGITS unique random digits. """
-    numbers = list('123456789')
-    random.shuffle(numbers) # Shuffle the numbers list into random order
-
-    #   Get the first NUM_DIGITS digits in the list for the secret number
-
-    secretNum = ''
-    for i in range(NUM_DIGITS):
-        secretNum += str(numbers[i])
-    
-    return secretNum
+def getSecretNum(numDigits=NUM_DIGITS, alphabet=ALPHABET):
+    """ Returns a string made up of numDigits unique random digits. """
+    #   Pick numDigits different digits from the alphabet, in random order
+    return ''.join(random.sample(alphabet, numDigits))
+
+
+def getAllSecretNums(numDigits=NUM_DIGITS, alphabet=ALPHABET):
+    """ Returns a list of every secret number getSecretNum() can return,
+    in sorted order. """
+    return [''.join(digits) for digits in itertools.permutations(alphabet, numDigits)]
+
+
+def isValidGuess(guess, numDigits=NUM_DIGITS, alphabet=ALPHABET):
+    """ Returns True if guess is numDigits digits from the alphabet """
+    return len(guess) == numDigits and set(guess) <= set(alphabet)
+
+
+@functools.lru_cache(maxsize=None)
+def getAlphabetBits(alphabet):
+    """ Returns (digitBits, placeBits) for the alphabet: a dict of each
+    digit's bit in a digit mask, and a list of such dicts for each place
+    in a place mask """
+    size = len(alphabet)
+    digitBits = {digit: 1 << i for i, digit in enumerate(alphabet)}
+    placeBits = [{digit: 1 << (place * size + i) for i, digit in enumerate(alphabet)}
+                 for place in range(size)]
+    return digitBits, placeBits
+
+
+@functools.lru_cache(maxsize=MASK_CACHE_SIZE)
+def getMasks(number, alphabet=ALPHABET):
+    """ Returns (digitMask, placeMask) for a number made of different digits.
+    digitMask has one bit set for each digit in the number, and placeMask
+    one bit for each (place, digit) pair. """
+    digitBits, placeBits = getAlphabetBits(alphabet)
+    return (sum(map(digitBits.__getitem__, number)),
+            sum(map(dict.__getitem__, placeBits, number)))
+
+
+def getClueCounts(guessMasks, secretMasks):
+    """ Returns (fermi, pico) for the masks (see getMasks()) of a guess and
+    secret number. The bits the masks share count the digits the numbers
+    have in common, and the digits in the same place. """
+    fermi = (guessMasks[1] & secretMasks[1]).bit_count()
+    return fermi, (guessMasks[0] & secretMasks[0]).bit_count() - fermi
+
+
+def getClueCountsByScan(guess, secretNum):
+    """ Returns (fermi, pico) for a guess and secret number checked one
+    place at a time, for numbers that repeat digits or leave the alphabet
+    and so have no masks """
+    fermi = pico = 0
+    for guessDigit, secretDigit in zip(guess, secretNum):
+        if guessDigit == secretDigit:
+            fermi += 1
+        elif guessDigit in secretNum:
+            pico += 1
+    return fermi, pico
+
+
+def getCluesBatch(guesses, secretNums, alphabet=ALPHABET):
+    """ Returns an array of clue codes, one for each guess in guesses
+    scored against the secret number at the same place in secretNums.
+    Guesses must be valid and all the same length, numDigits. A code is
+    fermi * (numDigits + 1) + pico, see decodeClues(). """
+    if len(guesses) != len(secretNums):
+        raise ValueError('guesses and secretNums must be the same length')
+    if not guesses:
+        return array('B')
+    numDigits = len(guesses[0])
+    alphabets = itertools.repeat(alphabet)
+    codes = array('B')
+    for guess, secretNum, (guessDigits, guessPlaces), (secretDigits, secretPlaces) in zip(
+            guesses, secretNums, map(getMasks, guesses, alphabets), map(getMasks, secretNums, alphabets)):
+        if guessDigits.bit_count() == numDigits and secretDigits.bit_count() == numDigits:
+            #   With pico = common - fermi the code is fermi * numDigits + common
+            codes.append((guessPlaces & secretPlaces).bit_count() * numDigits
+                         + (guessDigits & secretDigits).bit_count())
+        else:
+            #   A repeated digit's bits add up into other bits (so fewer are
+            #   set), and the masks can't be used
+            fermi, pico = getClueCountsByScan(guess, secretNum)
+            codes.append(fermi * (numDigits + 1) + pico)
+    return codes
+
+
+def decodeClues(code, numDigits):
+    """ Returns (fermi, pico) for a clue code from getCluesBatch() of
+    numDigits digit guesses """
+    return divmod(code, numDigits + 1)
+
+
+def getCluesText(fermi, pico):
+    """ Returns the Pico, Fermi, Bagels clues for fermi and pico counts
+    of a guess that is not a win """
+    if fermi + pico == 0:
+        return 'Bagels' # There are no correct digits
+    #   'Fermi' sorts before 'Pico', so this is already in alphabetical order
+    #   and the order of the places does not give information away
+    return ' '.join(['Fermi'] * fermi + ['Pico'] * pico)
 
 
 def getClues(guess, secretNum):
@@ -102,26 +196,14 @@ def getClues(guess, secretNum):
     and secret number pair """
     if guess == secretNum:
         return 'You got it!'
-    
-    clues = []
-    for i in range(len(guess)):
-        if guess[i] == secretNum[i]:
-            #   A correct digit in the right plae
-            clues.append('Fermi')
-        elif guess[i] in secretNum:
-            #   A correct digit in an incorrect place.
-            clues.append('Pico')
-
-            
-    if len(clues) == 0:
-        return 'Bagels' # There are no correct digits
 
+    if all(len(set(number)) == len(number) and set(number) <= ALPHABET_SET
+           for number in (guess, secretNum)):
+        #   No repeated digits, so the clues can be counted with bitmasks
+        fermi, pico = getClueCounts(getMasks(guess), getMasks(secretNum))
     else:
-        #   Sort the clues into alphabetical order so their original order
-        #   does not give information away
-        clues.sort()
-        #   Make a single  string from the list of string clues.
-        return ' '.join(clues)
+        fermi, pico = getClueCountsByScan(guess, secretNum)
+    return getCluesText(fermi, pico)
 
 
 #   If the program is run directly (instead of imported), run the game
@@ -0,0 +1,144 @@
+"""
+
+Evil Bagels, by Emmanuel Munyite
+
+Bagels where the host cheats. Instead of picking a secret number at the
+
+start, it keeps every secret number that still fits the clues given so
+
+far. After each guess it gives the clue that keeps the most of them,
+
+so every guess is answered in the worst way possible. This makes it a
+
+worst case test for players and for bagels_solver.
+
+Every number is kept as the two bitmasks from Bagels.getMasks(), so the
+
+clue codes for a guess against all of them are worked out in one pass,
+
+and a Counter over the codes gives the size of each group.
+
+Tags: short,game,puzzle,ai
+
+"""
+import argparse
+import time
+from collections import Counter
+from itertools import compress
+from operator import add
+
+import Bagels
+import bagels_solver
+
+
+class EvilHost:
+    """ The host of one game of evil Bagels with numDigits digits from
+    alphabet """
+
+    def __init__(self, numDigits=Bagels.NUM_DIGITS, alphabet=Bagels.ALPHABET):
+        if not 0 < numDigits <= len(alphabet):
+            raise ValueError('numDigits must be between 1 and the size of the alphabet')
+        self.numDigits = numDigits
+        self.alphabet = alphabet
+        self.winCode = numDigits * (numDigits + 1)
+        #   The numbers still possible and their masks, in matching order
+        self.numbers = Bagels.getAllSecretNums(numDigits, alphabet)
+        masks = bagels_solver.getAllMasks(numDigits, alphabet)
+        self.digitMasks = [digits for digits, places in masks]
+        self.placeMasks = [places for digits, places in masks]
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def getCodes(self, guess):
+        """ Returns the bytes of clue codes for guess against every number
+        still possible (see bagels_solver.getClueCode()) """
+        guessDigits, guessPlaces = Bagels.getMasks(guess, self.alphabet)
+        fermis = map(int.bit_count, map(guessPlaces.__and__, self.placeMasks))
+        commons = map(int.bit_count, map(guessDigits.__and__, self.digitMasks))
+        return bytes(map(add, map(self.numDigits.__mul__, fermis), commons))
+
+    def guess(self, guess):
+        """ Returns the clue code for guess that keeps the most numbers
+        possible, and drops the numbers that don't fit it. The guess must
+        be numDigits different digits from the alphabet. """
+        codes = self.getCodes(guess)
+        counts = Counter(codes)
+        #   Ties go to the lowest code, and to anything but a win
+        code = max(sorted(counts), key=lambda code: (counts[code], code != self.winCode))
+        keep = codes.translate(bytes(256)[:code] + b'\x01' + bytes(255 - code))
+        self.numbers = list(compress(self.numbers, keep))
+        self.digitMasks = list(compress(self.digitMasks, keep))
+        self.placeMasks = list(compress(self.placeMasks, keep))
+        return code
+
+
+def getClueText(code, numDigits=Bagels.NUM_DIGITS):
+    """ Returns the Pico, Fermi, Bagels clues (as Bagels.getClues() words
+    them) for a clue code """
+    if code == numDigits * (numDigits + 1):
+        return 'You got it!'
+    return Bagels.getCluesText(*Bagels.decodeClues(code, numDigits))
+
+
+def playSolver(strategy='minimax', numDigits=Bagels.NUM_DIGITS, alphabet=Bagels.ALPHABET):
+    """ Let a bagels_solver.Solver play against the evil host. Returns
+    (guesses, hostSeconds): the guesses it made and the time the host
+    spent answering each one. """
+    solver = bagels_solver.Solver(strategy, numDigits, alphabet)
+    host = EvilHost(numDigits, alphabet)
+    remaining = list(range(solver.size))
+    guesses = []
+    hostSeconds = []
+    while True:
+        guess = solver.chooseGuess(remaining)
+        guesses.append(solver.candidates[guess])
+        start = time.perf_counter()
+        code = host.guess(solver.candidates[guess])
+        hostSeconds.append(time.perf_counter() - start)
+        if code == host.winCode:
+            return guesses, hostSeconds
+        codes = solver.getCodes(guess, remaining)
+        remaining = [number for number, numberCode in zip(remaining, codes) if numberCode == code]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play Bagels against a host that cheats.')
+    parser.add_argument('--digits', type=int, default=Bagels.NUM_DIGITS,
+        help=f'number of digits in the secret number (default: {Bagels.NUM_DIGITS})')
+    parser.add_argument('--alphabet', default=Bagels.ALPHABET,
+        help=f'the digits secret numbers are made from (default: {Bagels.ALPHABET})')
+    parser.add_argument('--solver', choices=('minimax', 'information'),
+        help='let bagels_solver play with this strategy instead of you')
+    args = parser.parse_args()
+    if len(set(args.alphabet)) != len(args.alphabet) or not 0 < args.digits <= len(args.alphabet):
+        parser.error('--alphabet must not repeat digits and have at least --digits of them')
+
+    if args.solver is not None:
+        guesses, hostSeconds = playSolver(args.solver, args.digits, args.alphabet)
+        print(f'The {args.solver} solver needed {len(guesses)} guesses: {" ".join(guesses)}')
+        print(f'The host took {max(hostSeconds) * 1000:.3f} ms at most to answer a guess '
+              f'({sum(hostSeconds) / len(hostSeconds) * 1000:.3f} ms on average).')
+        return
+
+    print('Evil Bagels: the secret number is whatever makes your guess worst.')
+    print(f'Guess {args.digits} different digits from {args.alphabet}.')
+    host = EvilHost(args.digits, args.alphabet)
+    for numGuesses in range(1, Bagels.MAX_GUESSES + 1):
+        guess = ''
+        while not Bagels.isValidGuess(guess, args.digits, args.alphabet) \
+                or len(set(guess)) != len(guess):
+            print(f'Guess #{numGuesses}:')
+            guess = input('> ')
+        code = host.guess(guess)
+        print(getClueText(code, args.digits))
+        if code == host.winCode:
+            return
+        print(f'({len(host)} numbers still fit the clues)')
+    print('You ran out of guesses.')
+    print(f'The answer was {host.numbers[0]}')
+
+
+#   If the program is run directly (instead of imported), run the game
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+
+Bagels Server, by Emmanuel Munyite
+
+Hosts many games of Bagels at once over TCP with a simple line protocol,
+
+and comes with a load generator that plays lots of games against it and
+
+reports how long each guess took to answer.
+
+The protocol (one line each way, UTF-8):
+
+    server: BAGELS <NUM_DIGITS> <MAX_GUESSES>    when a game starts
+    client: <guess>                              e.g. 123
+    server: <clues>                              Pico, Fermi, Bagels or You got it!
+    server: LOST <secret number>                 after the last wrong guess
+    server: ERROR <message>                      for a guess that isn't valid
+                                                 (a line over LINE_LIMIT bytes
+                                                 also hangs up)
+    client: QUIT                                 to hang up
+
+After a win or a loss the server starts a new game with a new BAGELS line.
+
+Tags: short,game,puzzle,network
+
+"""
+import argparse
+import asyncio
+import time
+
+import Bagels
+
+#   The longest line a client may send, in bytes
+LINE_LIMIT = 1024
+
+
+class Session:
+    """ The state of one player's game. The masks of the secret number are
+    worked out when the game starts, so scoring a guess is just two
+    popcounts and never holds up the event loop. """
+
+    __slots__ = ('secretNum', 'secretMasks', 'numGuesses', 'history')
+
+    def __init__(self):
+        self.newGame()
+
+    def newGame(self):
+        self.secretNum = Bagels.getSecretNum()
+        self.secretMasks = Bagels.getMasks(self.secretNum)
+        self.numGuesses = 0
+        self.history = []   # (guess, clues) pairs of this game
+
+    def guess(self, guess):
+        """ Returns the reply lines for a guess """
+        if not Bagels.isValidGuess(guess) or len(set(guess)) != len(guess):
+            return [f'ERROR guess {Bagels.NUM_DIGITS} different digits from {Bagels.ALPHABET}']
+
+        self.numGuesses += 1
+        if guess == self.secretNum:
+            clues = 'You got it!'
+        else:
+            fermi, pico = Bagels.getClueCounts(Bagels.getMasks(guess), self.secretMasks)
+            clues = Bagels.getCluesText(fermi, pico)
+        self.history.append((guess, clues))
+
+        replies = [clues]
+        if guess == self.secretNum or self.numGuesses >= Bagels.MAX_GUESSES:
+            if guess != self.secretNum:
+                replies.append(f'LOST {self.secretNum}')
+            self.newGame()
+            replies.append(getGreeting())
+        return replies
+
+
+def getGreeting():
+    """ Returns the line that starts a game """
+    return f'BAGELS {Bagels.NUM_DIGITS} {Bagels.MAX_GUESSES}'
+
+
+async def handleClient(reader, writer):
+    """ Play games with one connected client until it hangs up """
+    session = Session()
+    writer.write((getGreeting() + '\n').encode())
+    try:
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                #   The line went over LINE_LIMIT, so the rest of it can't
+                #   be told apart from the next line
+                writer.write(f'ERROR lines must be at most {LINE_LIMIT} bytes\n'.encode())
+                await writer.drain()
+                break
+            if not line:
+                break   # The client hung up.
+            guess = line.decode(errors='replace').strip()
+            if guess.upper() == 'QUIT':
+                break
+            writer.write(('\n'.join(session.guess(guess)) + '\n').encode())
+            await writer.drain()
+    except ConnectionError:
+        pass    # The client went away.
+    finally:
+        writer.close()
+
+
+async def serve(host, port):
+    """ Run the server until it is cancelled """
+    server = await asyncio.start_server(handleClient, host, port, limit=LINE_LIMIT, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+async def playClient(host, port, numGuesses, latencies):
+    """ Connect to the server and make numGuesses random guesses, adding
+    the time each reply took (in seconds) to latencies """
+    reader, writer = await asyncio.open_connection(host, port)
+    await reader.readline()     # The greeting.
+    gameGuesses = 0
+    for i in range(numGuesses):
+        guess = Bagels.getSecretNum()
+        start = time.perf_counter()
+        writer.write((guess + '\n').encode())
+        reply = await reader.readline()
+        latencies.append(time.perf_counter() - start)
+
+        #   A finished game is followed by LOST (if it was lost) and a new greeting
+        gameGuesses += 1
+        if reply.startswith(b'You got it!'):
+            await reader.readline()
+            gameGuesses = 0
+        elif gameGuesses == Bagels.MAX_GUESSES:
+            await reader.readline()
+            await reader.readline()
+            gameGuesses = 0
+    writer.write(b'QUIT\n')
+    await writer.drain()
+    writer.close()
+    await writer.wait_closed()
+
+
+def getPercentile(sortedValues, fraction):
+    """ Returns the value below which fraction of sortedValues fall """
+    return sortedValues[min(len(sortedValues) - 1, int(fraction * len(sortedValues)))]
+
+
+async def runLoad(host, port, numClients, numGuesses):
+    """ Play numClients games at once, numGuesses guesses each, and return
+    (latencies, seconds taken) """
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(playClient(host, port, numGuesses, latencies)
+                           for i in range(numClients)))
+    return latencies, time.perf_counter() - start
+
+
+def reportLoad(latencies, elapsed):
+    latencies.sort()
+    print(f'{len(latencies)} guesses in {elapsed:.2f} seconds ({len(latencies) / elapsed:,.0f} guesses/sec)')
+    print(f'Latency p50: {getPercentile(latencies, 0.50) * 1000:.2f} ms, '
+          f'p99: {getPercentile(latencies, 0.99) * 1000:.2f} ms')
+
+
+async def benchmark(numClients, numGuesses):
+    """ Start a server on a free localhost port and run the load generator
+    against it """
+    server = await asyncio.start_server(handleClient, '127.0.0.1', 0, limit=LINE_LIMIT, backlog=4096)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reportLoad(*await runLoad('127.0.0.1', port, numClients, numGuesses))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bagels server and load generator.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serveCommand = commands.add_parser('serve', help='host Bagels games')
+    loadCommand = commands.add_parser('load', help='play many games against a server')
+    benchCommand = commands.add_parser('bench', help='serve and load test on localhost')
+    for command in (serveCommand, loadCommand):
+        command.add_argument('--host', default='127.0.0.1')
+        command.add_argument('--port', type=int, default=7777)
+    for command in (loadCommand, benchCommand):
+        command.add_argument('--clients', type=int, default=500,
+            help='number of players connected at once (default: 500)')
+        command.add_argument('--guesses', type=int, default=100,
+            help='guesses made by each player (default: 100)')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        print(f'Serving Bagels on {args.host}:{args.port}')
+        try:
+            asyncio.run(serve(args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    elif args.clients < 1 or args.guesses < 1:
+        parser.error('--clients and --guesses must be positive')
+    elif args.command == 'load':
+        reportLoad(*asyncio.run(runLoad(args.host, args.port, args.clients, args.guesses)))
+    else:
+        asyncio.run(benchmark(args.clients, args.guesses))
+
+
+#   If the program is run directly (instead of imported), run the server
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+
+Bagels Solver, by Emmanuel Munyite
+
+Lets the computer play Bagels. Every number is kept as the two bitmasks
+
+from Bagels.getMasks(), so the clues for a guess are two popcounts. For
+
+small games the clues of every guess against every secret number are
+
+worked out once into a table of small integers. Each guess is the one that
+
+splits the secret numbers still possible into the best groups of equal
+
+clues, and after each clue only the numbers still possible are checked.
+
+Tags: short,game,puzzle,ai
+
+"""
+import argparse
+import itertools
+import math
+import random
+import time
+from array import array
+from operator import itemgetter
+
+import Bagels
+
+#   Games with up to this many secret numbers get a full clue table
+TABLE_LIMIT = 1000
+
+#   In bigger games, a guess is picked from this many of the numbers still
+#   possible, scored against this many of them
+GUESS_SAMPLE = 64
+SECRET_SAMPLE = 512
+
+
+def getClueCode(guessMasks, secretMasks, numDigits=Bagels.NUM_DIGITS):
+    """ Returns the clues for a guess as one number:
+    fermi * (numDigits + 1) + pico """
+    #   With pico = common - fermi this is fermi * numDigits + common
+    return ((guessMasks[1] & secretMasks[1]).bit_count() * numDigits
+            + (guessMasks[0] & secretMasks[0]).bit_count())
+
+
+def getClueCodes(guessMasks, masks, numDigits=Bagels.NUM_DIGITS):
+    """ Returns the bytes of clue codes for a guess against every one of masks """
+    guessDigits, guessPlaces = guessMasks
+    return bytes((guessPlaces & places).bit_count() * numDigits + (guessDigits & digits).bit_count()
+                 for digits, places in masks)
+
+
+def getAllMasks(numDigits=Bagels.NUM_DIGITS, alphabet=Bagels.ALPHABET):
+    """ Returns the Bagels.getMasks() of every number in
+    Bagels.getAllSecretNums(), in the same order """
+    size = len(alphabet)
+    digitBits = [1 << digit for digit in range(size)]
+    placeBits = [[1 << (place * size + digit) for digit in range(size)]
+                 for place in range(numDigits)]
+    return [(sum(map(digitBits.__getitem__, digits)), sum(map(list.__getitem__, placeBits, digits)))
+            for digits in itertools.permutations(range(size), numDigits)]
+
+
+def buildClueTable(masks, numDigits=Bagels.NUM_DIGITS):
+    """ Returns an array('B') where table[g * len(masks) + s] is the clue
+    code of guessing number g when the secret is number s """
+    table = array('B')
+    for guessMasks in masks:
+        table.frombytes(getClueCodes(guessMasks, masks, numDigits))
+    return table
+
+
+def getWorstGroup(codes):
+    """ Returns the size of the largest group of equal clue codes """
+    return max(codes.count(code) for code in set(codes))
+
+
+def getInformation(codes):
+    """ Returns how much a guess tells (in bits) on average when it splits
+    the secret numbers by clue codes """
+    total = len(codes)
+    return -sum(count / total * math.log2(count / total)
+                for count in map(codes.count, set(codes)))
+
+
+class Solver:
+    """ Plays Bagels with numDigits digits from alphabet. strategy is
+    'minimax' (make the largest group of secret numbers that are still
+    possible as small as possible) or 'information' (learn the most on
+    average). Games too big for a clue table pick guesses from random
+    samples, using seed. """
+
+    def __init__(self, strategy='minimax', numDigits=Bagels.NUM_DIGITS,
+                 alphabet=Bagels.ALPHABET, seed=0):
+        if strategy not in ('minimax', 'information'):
+            raise ValueError(f'unknown strategy {strategy!r}')
+        if not 0 < numDigits <= len(alphabet):
+            raise ValueError('numDigits must be between 1 and the size of the alphabet')
+        self.strategy = strategy
+        self.numDigits = numDigits
+        self.candidates = Bagels.getAllSecretNums(numDigits, alphabet)
+        self.masks = getAllMasks(numDigits, alphabet)
+        self.size = len(self.candidates)
+        self.winCode = numDigits * (numDigits + 1)
+        self.rng = random.Random(seed)
+        self.rows = None
+        if self.size <= TABLE_LIMIT:
+            table = buildClueTable(self.masks, numDigits)
+            self.rows = [bytes(table[g * self.size:(g + 1) * self.size])
+                         for g in range(self.size)]
+        self.choices = {}   # Best guess for each group of remaining secrets
+
+    def getCodes(self, guess, remaining):
+        """ Returns the bytes of clue codes for guess against each of remaining """
+        if self.rows is not None:
+            if len(remaining) == 1:
+                return bytes((self.rows[guess][remaining[0]],))
+            return bytes(itemgetter(*remaining)(self.rows[guess]))
+        masks = self.masks
+        return getClueCodes(masks[guess], [masks[secret] for secret in remaining], self.numDigits)
+
+    def chooseGuess(self, remaining):
+        """ Returns the index of the best guess when the secret numbers at
+        the indexes in remaining are the ones still possible """
+        if len(remaining) <= 2:
+            return remaining[0]
+        if self.rows is not None:
+            key = tuple(remaining)
+            if key in self.choices:
+                return self.choices[key]
+            guesses = range(self.size)
+            secrets = remaining
+        else:
+            #   Too many numbers to try them all, so try a sample
+            key = None
+            guesses = remaining
+            if len(remaining) > GUESS_SAMPLE:
+                guesses = self.rng.sample(remaining, GUESS_SAMPLE)
+            secrets = remaining
+            if len(remaining) > SECRET_SAMPLE:
+                secrets = self.rng.sample(remaining, SECRET_SAMPLE)
+
+        possible = set(remaining)
+        best = bestScore = None
+        for guess in guesses:
+            codes = self.getCodes(guess, secrets)
+            if self.strategy == 'minimax':
+                score = (getWorstGroup(codes), guess not in possible)
+            else:
+                score = (-getInformation(codes), guess not in possible)
+            if bestScore is None or score < bestScore:
+                best, bestScore = guess, score
+
+        if key is not None:
+            self.choices[key] = best
+        return best
+
+    def split(self, guess, remaining):
+        """ Returns a dict of clue code to the secret numbers in remaining
+        that give that code for guess """
+        groups = {}
+        for secret, code in zip(remaining, self.getCodes(guess, remaining)):
+            groups.setdefault(code, []).append(secret)
+        return groups
+
+    def play(self, secretNum):
+        """ Returns the list of guesses made to find secretNum """
+        secret = self.candidates.index(secretNum)
+        remaining = list(range(self.size))
+        guesses = []
+        while True:
+            guess = self.chooseGuess(remaining)
+            guesses.append(self.candidates[guess])
+            if guess == secret:
+                return guesses
+            #   Only the numbers still possible are checked against the clue
+            code = getClueCode(self.masks[guess], self.masks[secret], self.numDigits)
+            codes = self.getCodes(guess, remaining)
+            remaining = [number for number, numberCode in zip(remaining, codes) if numberCode == code]
+
+    def solveAll(self):
+        """ Returns a list with the number of guesses needed for every
+        secret number, found by walking the whole game tree once """
+        counts = [0] * self.size
+        stack = [(list(range(self.size)), 1)]
+        while stack:
+            remaining, depth = stack.pop()
+            guess = self.chooseGuess(remaining)
+            for code, group in self.split(guess, remaining).items():
+                if code == self.winCode:
+                    counts[guess] = depth
+                else:
+                    stack.append((group, depth + 1))
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Let the computer play Bagels.')
+    parser.add_argument('--strategy', choices=('minimax', 'information'), default='minimax')
+    parser.add_argument('--digits', type=int, default=Bagels.NUM_DIGITS,
+        help=f'number of digits in the secret number (default: {Bagels.NUM_DIGITS})')
+    parser.add_argument('--alphabet', default=Bagels.ALPHABET,
+        help=f'the digits secret numbers are made from (default: {Bagels.ALPHABET})')
+    parser.add_argument('--secret', help='show the guesses made for this secret number')
+    args = parser.parse_args()
+    if len(set(args.alphabet)) != len(args.alphabet) or not 0 < args.digits <= len(args.alphabet):
+        parser.error('--alphabet must not repeat digits and have at least --digits of them')
+
+    start = time.perf_counter()
+    solver = Solver(args.strategy, args.digits, args.alphabet)
+    if args.secret is not None:
+        if not Bagels.isValidGuess(args.secret, args.digits, args.alphabet) \
+                or len(set(args.secret)) != args.digits:
+            parser.error(f'the secret number must be {args.digits} different digits from {args.alphabet}')
+        for number, guess in enumerate(solver.play(args.secret), 1):
+            fermi, pico = Bagels.getClueCounts(Bagels.getMasks(guess, args.alphabet),
+                                               Bagels.getMasks(args.secret, args.alphabet))
+            print(f'Guess #{number}: {guess}  Fermi x{fermi}, Pico x{pico}')
+        return
+
+    counts = solver.solveAll()
+    elapsed = time.perf_counter() - start
+    print(f'Solved all {solver.size} secret numbers in {elapsed:.2f} seconds ({args.strategy}).')
+    print(f'Average guesses: {sum(counts) / len(counts):.3f}, worst case: {max(counts)}')
+    print(f'Secret numbers found within {Bagels.MAX_GUESSES} guesses: '
+          f'{sum(count <= Bagels.MAX_GUESSES for count in counts)}')
+
+
+#   If the program is run directly (instead of imported), run the solver
+if __name__ == '__main__':
+    main()
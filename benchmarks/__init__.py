@@ -0,0 +1,5 @@
+"""
+Benchmarks for the hot paths of the games in this repository.
+
+Run one with python -m benchmarks.<name> from the top of the repository.
+"""
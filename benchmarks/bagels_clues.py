@@ -0,0 +1,52 @@
+"""
+Compares Bagels.getClues() with Bagels.getCluesBatch() for every
+NUM_DIGITS from 3 to 9, and checks that both give the same clues.
+
+Usage: python -m benchmarks.bagels_clues [--pairs N] [--seed N]
+"""
+import argparse
+import random
+import time
+
+import Bagels
+
+
+def benchmarkDigits(numDigits, numPairs, rng):
+    """ Returns (getClues seconds, getCluesBatch seconds) for numPairs
+    random guesses and secret numbers of numDigits digits """
+    guesses = [''.join(rng.sample(Bagels.ALPHABET, numDigits)) for i in range(numPairs)]
+    secretNums = [''.join(rng.sample(Bagels.ALPHABET, numDigits)) for i in range(numPairs)]
+
+    Bagels.getMasks.cache_clear()   # Start both runs with an empty cache
+    start = time.perf_counter()
+    clues = [Bagels.getClues(guess, secretNum) for guess, secretNum in zip(guesses, secretNums)]
+    oneByOne = time.perf_counter() - start
+
+    Bagels.getMasks.cache_clear()
+    start = time.perf_counter()
+    codes = Bagels.getCluesBatch(guesses, secretNums)
+    batch = time.perf_counter() - start
+
+    for guess, secretNum, clue, code in zip(guesses, secretNums, clues, codes):
+        if guess != secretNum and clue != Bagels.getCluesText(*Bagels.decodeClues(code, numDigits)):
+            raise AssertionError(f'getCluesBatch() disagrees with getClues() for {guess} {secretNum}')
+    return oneByOne, batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=200_000,
+        help='guesses scored for each number of digits (default: 200,000)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    print(f'{"digits":>6} {"getClues/s":>14} {"batch/s":>14} {"speedup":>8}')
+    for numDigits in range(3, len(Bagels.ALPHABET) + 1):
+        oneByOne, batch = benchmarkDigits(numDigits, args.pairs, rng)
+        print(f'{numDigits:>6} {args.pairs / oneByOne:>14,.0f} {args.pairs / batch:>14,.0f} '
+              f'{oneByOne / batch:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+Times the hot functions of the games and reports, as JSON, the calls per
+second and the memory each call uses, so runs on different revisions can
+be compared.
+
+peakBytes is the most memory one call had allocated at once, measured
+with tracemalloc. retainedBlocks is the number of memory blocks still
+held per call after many calls, from sys.getallocatedblocks() (anything
+above 0 is kept in a cache or leaked).
+
+--profile and --trace-memory print where the time and memory of each
+benchmark run go (with cProfile and tracemalloc) to stderr, leaving the
+JSON on stdout.
+
+Usage: python -m benchmarks.hot_paths [--only NAME ...] [--output FILE]
+                                      [--profile] [--trace-memory]
+"""
+import argparse
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import platform
+import pstats
+import random
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+import Bagels
+import birthday_paradox
+import bitmap_messages
+import blackjack
+
+
+def getBenchmarks(seed=0):
+    """ Returns a dict of benchmark name to a function that makes one call
+    of it. Arguments are made up front, from seed, so only the call is timed. """
+    rng = random.Random(seed)
+    random.seed(seed)   # getSecretNum() and getDeck() use the random module
+    hand = [('A', blackjack.SPADES), ('7', blackjack.HEARTS), ('K', blackjack.CLUBS)]
+    birthdays = birthday_paradox.getBirthdays(23, rng)
+    return {
+        'Bagels.getClues': functools.partial(Bagels.getClues, '123', '312'),
+        'Bagels.getSecretNum': Bagels.getSecretNum,
+        'blackjack.getHandValue': functools.partial(blackjack.getHandValue, hand),
+        'blackjack.getDeck': blackjack.getDeck,
+        'blackjack.displayCards': functools.partial(blackjack.displayCards, hand),
+        'birthday_paradox.getBirthdays': functools.partial(birthday_paradox.getBirthdays, 23, rng),
+        'birthday_paradox.getMatch': functools.partial(birthday_paradox.getMatch, birthdays),
+        'bitmap_messages.renderBitmap': functools.partial(bitmap_messages.renderBitmap, 'Hello!'),
+    }
+
+
+def timeCalls(function, repeat=5):
+    """ Returns the calls per second of function, the best of repeat runs
+    of about 0.2 seconds each """
+    timer = timeit.Timer(function)
+    number, seconds = timer.autorange()
+    best = min([seconds] + timer.repeat(repeat - 1, number))
+    return number / best
+
+
+def measureMemory(function, calls=1000):
+    """ Returns (peakBytes, retainedBlocks): the most memory one call of
+    function had allocated at once, and the memory blocks still held per
+    call after calls calls """
+    function()  # Let caches and lazy set up happen before measuring
+    blocksBefore = sys.getallocatedblocks()
+    for i in range(calls):
+        function()
+    retainedBlocks = (sys.getallocatedblocks() - blocksBefore) / calls
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function()
+        peakBytes = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return peakBytes, max(0.0, retainedBlocks)
+
+
+def profileCalls(name, function, calls=10_000, out=sys.stderr):
+    """ Prints the functions where calls calls of function spend the most time """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for i in range(calls):
+        function()
+    profiler.disable()
+    print(f'--- cProfile: {name} ({calls} calls)', file=out)
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(10)
+
+
+def traceMemory(name, function, calls=1000, out=sys.stderr):
+    """ Prints the lines that allocated the most memory over calls calls of function """
+    tracemalloc.start()
+    try:
+        for i in range(calls):
+            function()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    print(f'--- tracemalloc: {name} ({calls} calls)', file=out)
+    for statistic in snapshot.statistics('lineno')[:10]:
+        print(statistic, file=out)
+
+
+def getRevision():
+    """ Returns the git commit of the working tree, or None outside git """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def runBenchmarks(names=None, seed=0, profile=False, memoryTrace=False):
+    """ Returns the results dict for the benchmarks in names (all by default) """
+    benchmarks = getBenchmarks(seed)
+    results = {}
+    for name in names or benchmarks:
+        function = benchmarks[name]
+        #   Keep what displayCards() prints out of the results
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            callsPerSecond = timeCalls(function)
+            peakBytes, retainedBlocks = measureMemory(function)
+            if profile:
+                profileCalls(name, function)
+            if memoryTrace:
+                traceMemory(name, function)
+        results[name] = {'opsPerSecond': round(callsPerSecond),
+                         'peakBytes': peakBytes,
+                         'retainedBlocks': round(retainedBlocks, 3)}
+    return {'revision': getRevision(), 'python': platform.python_version(),
+            'seed': seed, 'benchmarks': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', nargs='+', choices=sorted(getBenchmarks()), metavar='NAME',
+        help='run only these benchmarks')
+    parser.add_argument('--output', help='write the JSON to this file instead of stdout')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', action='store_true',
+        help='print a cProfile report for each benchmark to stderr')
+    parser.add_argument('--trace-memory', action='store_true',
+        help='print the top tracemalloc allocation sites for each benchmark to stderr')
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.only, args.seed, args.profile, args.trace_memory)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as outputFile:
+            json.dump(results, outputFile, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -36,45 +36,370 @@ More info at https://en.wikipedia.org/wiki/Birthday_problem
 Tags: short, math, simulation
 
 """
-from ast import While
-import datetime, random
-from urllib import response
+import math, os, random, time
+from array import array
+from collections import namedtuple
+from functools import lru_cache
 
-#   Function to generate the birthdays
-def getBirthdays(numberOfBirthdays):
-    """ Returns a list of number random date objects for birthdays """
+#   Set up a tuple of month names in order
+Months = ('Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec')
 
-    birthdays = []
+#   Number of days in each month. The year is unimportant for our simulation,
+#   as long as all birthdays have the same (non-leap) year.
+MonthLengths = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+#   Even draws use one 32-bit word each, folded into a day with word % 365
+RANDOM_WORD = array('I')
+
+#   Weighted draws use one 64-bit word each: word % 365 picks a column of
+#   the alias table and word // 365 (below ALIAS_SCALE) is the coin flip
+ALIAS_WORD = array('Q')
+ALIAS_SCALE = (2 ** 64 - 1) // 365 + 1
+
+AliasTable = namedtuple('AliasTable', 'thresholds aliases')
+
+
+#   Function to read a birthday distribution
+def loadDayWeights(path):
+    """ Returns a list of 365 weights, one per day of the year, read from
+    a CSV file of observed births.
+
+    Each row is either `dayOfYear, births` (1 to 365) or `month, day,
+    births`, with the month as a number or a name such as Jan. Rows for
+    the same day add up (as in data for several years), and Feb 29 counts
+    as Feb 28. Rows that don't start with a number or month name, such as
+    a header, are skipped. """
+    import csv
+    monthStarts = [sum(MonthLengths[:month]) for month in range(12)]
+    monthNumbers = {name.lower(): number for number, name in enumerate(Months, 1)}
+    weights = [0.0] * 365
+    with open(path, newline='') as csvFile:
+        for row in csv.reader(csvFile):
+            row = [field.strip() for field in row if field.strip()]
+            if len(row) == 2 and row[0].isdecimal():
+                dayOfYear = int(row[0]) - 1
+            elif len(row) == 3 and (row[0].isdecimal() or row[0][:3].lower() in monthNumbers):
+                month = int(row[0]) if row[0].isdecimal() else monthNumbers[row[0][:3].lower()]
+                day = int(row[1])
+                if not 1 <= month <= 12 or not 1 <= day <= MonthLengths[month - 1] + (month == 2):
+                    raise ValueError(f'{path}: there is no day {month}/{day}')
+                dayOfYear = monthStarts[month - 1] + min(day, MonthLengths[month - 1]) - 1
+            else:
+                continue
+            if not 0 <= dayOfYear < 365:
+                raise ValueError(f'{path}: day of the year {dayOfYear + 1} is not between 1 and 365')
+            weights[dayOfYear] += float(row[-1])
+    return weights
+
+
+#   Function to set up weighted draws
+def makeAliasTable(weights):
+    """ Returns an AliasTable (Vose's alias method) for drawing days of the
+    year with the given 365 weights in constant time per draw.
+
+    Day d is drawn by picking a column at random and keeping it if a coin
+    flip is below thresholds[d] (out of ALIAS_SCALE), else taking aliases[d]. """
+    if len(weights) != 365:
+        raise ValueError('there must be one weight for each of the 365 days')
+    total = sum(weights)
+    if total <= 0 or min(weights) < 0:
+        raise ValueError('weights must not be negative and must not all be 0')
+
+    #   Scale so the average day is 1, then pair each day below 1 with one
+    #   above it that tops it up
+    scaled = [weight * 365 / total for weight in weights]
+    accept = [1.0] * 365
+    aliases = list(range(365))
+    small = [day for day, share in enumerate(scaled) if share < 1]
+    large = [day for day, share in enumerate(scaled) if share >= 1]
+    while small and large:
+        smallDay = small.pop()
+        largeDay = large.pop()
+        accept[smallDay] = scaled[smallDay]
+        aliases[smallDay] = largeDay
+        scaled[largeDay] -= 1 - scaled[smallDay]
+        (small if scaled[largeDay] < 1 else large).append(largeDay)
+    #   Whatever is left over is 1 up to rounding errors, so always kept
+
+    return AliasTable(array('Q', [round(share * ALIAS_SCALE) for share in accept]),
+                      array('H', aliases))
+
+
+#   Function to draw random days of the year
+def getRandomDays(count, rng=random, aliasTable=None):
+    """ Returns a list of count random days of the year (0 to 364), all
+    equally likely or weighted by an AliasTable """
+    if aliasTable is not None:
+        thresholds, aliases = aliasTable
+        words = array('Q', rng.randbytes(count * ALIAS_WORD.itemsize))
+        return [day if word // 365 < thresholds[day := word % 365] else aliases[day]
+                for word in words]
+
+    #   One call fills the whole block with random 32-bit integers, which
+    #   are folded into a day of the year (the modulo bias is below 1e-7)
+    words = array('I', rng.randbytes(count * RANDOM_WORD.itemsize))
+    return [word % 365 for word in words]
 
-    for i in range (numberOfBirthdays):
-        # The year is unimportant for our simulation, as long as all
-        # birthdays have the same year.
-        startOfYear = datetime.date(2001,1,1)
 
-        #   Get a random day into the year
-        randomNumberOfDays = datetime.timedelta(random.randint(0,364))
-        birthday = startOfYear + randomNumberOfDays
-        birthdays.append(birthday)
-    
-    return birthdays
+#   Function to generate the birthdays
+def getBirthdays(numberOfBirthdays, rng=random, aliasTable=None):
+    """ Returns an array of numberOfBirthdays random birthdays, each one a day of the year """
+    #   Birthdays are stored as the day of the year (0 is Jan 1) in unsigned
+    #   shorts, rather than as date objects, until they are displayed.
+    return array('H', getRandomDays(numberOfBirthdays, rng, aliasTable))
 
 
 #   Function to get matching birthdays
-def getMatch(birthdays):
-    """ Returns the date object of a date that occurs more than once in birthdays list """
-    if len(birthdays) == len(set(birthdays)):
-        #   Set() takes one argument, eg a list, and returns a unique list 
-        # containing each element appearing only once
-        return None #   Since all birthdays will be unique
-
-    #   Compare each birthday to every other birthday
-    for a, birthdayA in enumerate(birthdays):
-        for b, birthdayB in enumerate(birthdays[a + 1 :]):
-            if birthdayA == birthdayB:
-                return birthdayA    #   Return matching birthday
-
-#   Display the intro
-print("""
+def getMatch(birthdays, shared=2):
+    """ Returns the first day of the year that occurs shared times in
+    birthdays, or None if no day is shared by that many """
+    #   Set() takes one argument, eg a list, and returns a unique list
+    # containing each element appearing only once. shared people on one
+    # day need at least shared - 1 repeats.
+    if len(set(birthdays)) > len(birthdays) - shared + 1:
+        return None #   Not enough birthdays repeat
+
+    #   Count each day as we see it, the first day to reach shared is a match
+    counts = [0] * 365
+    for birthday in birthdays:
+        counts[birthday] += 1
+        if counts[birthday] == shared:
+            return birthday    #   Return matching birthday
+
+
+#   Function to turn a day of the year into text
+def getDateText(dayOfYear):
+    """ Returns a day of the year as text such as 'Jan 1' """
+    for month, monthLength in enumerate(MonthLengths):
+        if dayOfYear < monthLength:
+            return f"{Months[month]} {dayOfYear + 1}"
+        dayOfYear -= monthLength
+    raise ValueError('dayOfYear must be between 0 and 364')
+
+
+#   Number of birthdays drawn per chunk by countMatches(), keeps memory bounded
+BATCH_SIZE = 1_000_000
+
+#   Function to run many simulations in one batch
+def countMatches(numDays, numTrials, rng=random, aliasTable=None, shared=2):
+    """ Returns how many of numTrials groups of numDays random birthdays
+    contain at least one birthday shared by shared people (a matching
+    pair by default). Birthdays are weighted by aliasTable if given.
+
+    Instead of building date objects one trial at a time, a whole block of
+    (trials x numDays) day-of-year integers is drawn at once and each row
+    is checked for a collision by comparing its length to its set size.
+    For 3 or more people, only the rows with enough repeats have their
+    days counted by getMatch(). """
+    if numDays < 1:
+        raise ValueError('a group must have at least 1 person')
+    rowsPerChunk = max(1, BATCH_SIZE // numDays)
+    matches = 0
+    done = 0
+
+    while done < numTrials:
+        rows = min(rowsPerChunk, numTrials - done)
+        draws = getRandomDays(rows * numDays, rng, aliasTable)
+        groups = (draws[start:start + numDays] for start in range(0, rows * numDays, numDays))
+
+        if shared == 2:
+            #   A row has a match when some day appears in it more than once
+            uniqueCounts = map(len, map(set, groups))
+            matches += sum(count != numDays for count in uniqueCounts)
+        else:
+            matches += sum(getMatch(group, shared) is not None for group in groups)
+        done += rows
+
+    return matches
+
+#   Trials per shard handed to a worker by simulateParallel(). Shards (not
+#   workers) own the seed streams, so results do not depend on the pool size.
+SHARD_SIZE = 1_000_000
+
+SimulationResult = namedtuple('SimulationResult', 'matches trials probability low high')
+
+
+def confidenceInterval(matches, trials, z=1.96):
+    """ Returns the (low, high) Wilson score interval for matches out of
+    trials. z=1.96 gives a 95% interval. """
+    p = matches / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def simulateShard(numDays, numTrials, seed, shard, aliasTable=None, shared=2):
+    """ Returns the match count of one shard, using its own random stream
+    derived from the run seed and the shard number. """
+    rng = random.Random(f'{seed}-{shard}')
+    return countMatches(numDays, numTrials, rng, aliasTable, shared)
+
+
+def simulateParallel(numDays, numTrials, workers=None, seed=None, aliasTable=None, shared=2):
+    """ Runs numTrials simulations of numDays birthdays split across a pool
+    of worker processes and returns a SimulationResult.
+
+    The same seed always gives the same result, whatever the number of
+    workers. With seed=None a random seed is picked. """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    shards = [(shard, min(SHARD_SIZE, numTrials - start))
+              for shard, start in enumerate(range(0, numTrials, SHARD_SIZE))]
+
+    if workers == 1 or len(shards) == 1:
+        counts = [simulateShard(numDays, size, seed, shard, aliasTable, shared)
+                  for shard, size in shards]
+    else:
+        #   Importing the process pool is slow, so only done when it is used
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            counts = pool.map(simulateShard, [numDays] * len(shards),
+                [size for shard, size in shards], [seed] * len(shards),
+                [shard for shard, size in shards], [aliasTable] * len(shards),
+                [shared] * len(shards))
+            counts = list(counts)
+
+    matches = sum(counts)
+    low, high = confidenceInterval(matches, numTrials)
+    return SimulationResult(matches, numTrials, matches / numTrials, low, high)
+
+
+SweepResult = namedtuple('SweepResult', 'groupSize exact estimate trials')
+
+
+@lru_cache(maxsize=None)
+def noMatchProbability(numDays):
+    """ Returns the exact probability that numDays birthdays are all different. """
+    if numDays <= 1:
+        return 1.0
+    if numDays > 365:
+        return 0.0
+    return noMatchProbability(numDays - 1) * (365 - numDays + 1) / 365
+
+
+def exactProbability(numDays):
+    """ Returns the exact probability that at least two of numDays birthdays match. """
+    return 1.0 - noMatchProbability(numDays)
+
+
+#   Trials in the first batch of each group size swept by sweepGroupSizes()
+FIRST_SWEEP_BATCH = 100
+
+
+def sweepGroupSizes(groupSizes, tolerance=0.005, maxTrials=100_000, batchTrials=2_000, seed=None):
+    """ Returns a list of SweepResult, one per group size in groupSizes.
+
+    Each size is simulated in batches that start at FIRST_SWEEP_BATCH
+    trials and double up to batchTrials, and its run stops as soon as the
+    estimate and its standard error are both within tolerance of the exact
+    probability (or maxTrials is reached). Sizes whose answer is all but
+    certain stop after the first small batch. Every size must be at least 1
+    (countMatches() raises ValueError otherwise). """
+    rng = random.Random(seed)
+    results = []
+
+    for groupSize in groupSizes:
+        exact = exactProbability(groupSize)
+        matches = 0
+        trials = 0
+        batch = min(FIRST_SWEEP_BATCH, batchTrials)
+        while trials < maxTrials:
+            batch = min(batch, maxTrials - trials)
+            matches += countMatches(groupSize, batch, rng)
+            trials += batch
+            estimate = matches / trials
+            standardError = math.sqrt(estimate * (1 - estimate) / trials)
+            if abs(estimate - exact) <= tolerance and standardError <= tolerance:
+                break   #   Close enough, move on to the next group size
+            batch = min(batch * 2, batchTrials)
+        results.append(SweepResult(groupSize, exact, matches / trials, trials))
+
+    return results
+
+
+Progress = namedtuple('Progress', 'matches trials probability standardError trialsPerSecond')
+
+
+def getAliasTableHash(aliasTable):
+    """ Returns a hex digest identifying the weights of aliasTable, or None
+    for evenly spread birthdays """
+    if aliasTable is None:
+        return None
+    import hashlib
+    thresholds, aliases = aliasTable
+    return hashlib.sha256(thresholds.tobytes() + aliases.tobytes()).hexdigest()
+
+
+def saveCheckpoint(checkpointPath, numDays, matches, trials, rng, shared=2, aliasTable=None):
+    """ Writes the partial counts and random state of a run to checkpointPath """
+    import json
+    version, internalState, gaussNext = rng.getstate()
+    checkpoint = {'numDays': numDays, 'shared': shared, 'weights': getAliasTableHash(aliasTable),
+                  'matches': matches, 'trials': trials,
+                  'state': [version, internalState, gaussNext]}
+    #   Write to a temporary file first so an interrupted write never
+    #   leaves a half-written checkpoint behind
+    temporaryPath = checkpointPath + '.tmp'
+    with open(temporaryPath, 'w') as checkpointFile:
+        json.dump(checkpoint, checkpointFile)
+    os.replace(temporaryPath, checkpointPath)
+
+
+def loadCheckpoint(checkpointPath, numDays, rng, shared=2, aliasTable=None):
+    """ Restores rng from checkpointPath and returns its (matches, trials) """
+    import json
+    with open(checkpointPath) as checkpointFile:
+        checkpoint = json.load(checkpointFile)
+    if checkpoint['numDays'] != numDays:
+        raise ValueError(f"{checkpointPath} is a checkpoint for groups of "
+                         f"{checkpoint['numDays']}, not {numDays}")
+    if checkpoint.get('shared', 2) != shared:
+        raise ValueError(f"{checkpointPath} is a checkpoint for birthdays shared by "
+                         f"{checkpoint.get('shared', 2)}, not {shared}")
+    if checkpoint.get('weights') != getAliasTableHash(aliasTable):
+        raise ValueError(f'{checkpointPath} is a checkpoint for different --weights')
+    version, internalState, gaussNext = checkpoint['state']
+    rng.setstate((version, tuple(internalState), gaussNext))
+    return checkpoint['matches'], checkpoint['trials']
+
+
+def iterSimulation(numDays, numTrials, reportEvery=100_000, seed=None, checkpointPath=None,
+                   aliasTable=None, shared=2):
+    """ Runs numTrials simulations of numDays birthdays, yielding a Progress
+    with the running estimate after every reportEvery trials.
+
+    With checkpointPath, the counts and random state are saved after every
+    report, and a run started with an existing checkpoint resumes from it. """
+    rng = random.Random(seed)
+    matches = trials = 0
+    if checkpointPath is not None and os.path.exists(checkpointPath):
+        matches, trials = loadCheckpoint(checkpointPath, numDays, rng, shared, aliasTable)
+
+    startTrials = trials
+    start = time.perf_counter()
+    while trials < numTrials:
+        batch = min(reportEvery, numTrials - trials)
+        matches += countMatches(numDays, batch, rng, aliasTable, shared)
+        trials += batch
+
+        if checkpointPath is not None:
+            saveCheckpoint(checkpointPath, numDays, matches, trials, rng, shared, aliasTable)
+
+        probability = matches / trials
+        elapsed = time.perf_counter() - start
+        yield Progress(matches, trials, probability,
+                       math.sqrt(probability * (1 - probability) / trials),
+                       (trials - startTrials) / elapsed if elapsed else 0.0)
+
+
+def main():
+    """ Runs the interactive Birthday Paradox program """
+    #   Display the intro
+    print("""
         Birthday Paradox, by Emmanuel Munyite emunyite@gmail.com
     ----------------------------------------------------------------
 
@@ -87,78 +412,146 @@ simulations) to explore this concept.
 
 """)
 
-#   Set up a tuple of month names in order
-Months = ('Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec')
+    while True: #   Keep asking until the user enters a valid number of birthdays
+        print("How many birthdays shall I generate? (Max 100)")
+        response = input('> ')
+        if response.isdecimal() and (0 < int(response) <= 100):
+            numDays = int(response)
+            break # User has entered a valid amount
 
-while True: #   Keep asking until the user enters a valid number of birthdays
-    print("How many birthdays shall I generate? (Max 100)")
-    response = input('> ')
-    if response.isdecimal() and (0 < int(response) <= 100):
-        numDays = int(response)
-        break # User has entered a valid amount
+    print()
 
-print()
+    #   Generate and display the birthdays
+    print(f"Here are {numDays} birthdays: ")
+    birthdays = getBirthdays(numDays)
 
-#   Generate and display the birthdays
-print(f"Here are {numDays} birthdays: ")
-birthdays = getBirthdays(numDays)
+    for i, birthday in enumerate(birthdays):
+        if i != 0:
+            #   Display a comma for each birthday after the first birthday
+            print(', ', end='')
+        print(getDateText(birthday),end="")
 
-for i, birthday in enumerate(birthdays):
-    if i != 0:
-        #   Display a comma for each birthday after the first birthday
-        print(', ', end='')
-        monthName = Months[birthday.month-1]
-        dateText = f"{monthName} {birthday.day}"
-        print(dateText,end="")
 
+    print()
+    print()
 
-print()
-print()
+    #   Determine if there are two birthdays that match
+    match = getMatch(birthdays)
 
-#   Determine if there are two birthdays that match
-match = getMatch(birthdays)
+    #   Display the results
+    print("In this simulation, ",end="")
 
-#   Display the results
-print("In this simulation, ",end="")
+    if match != None:
+        print(f"More than one people have a birthday on {getDateText(match)}")
+    else:
+        print("There are no matching birthdays")
 
-if match != None:
-    monthName = Months[match.month-1]
-    dateText = f"{monthName} {match.day}"
-    print(f"More than one people have a birthday on {dateText}")
-else:
-    print("There are no matching birthdays")
+    print()
 
-print()
+    #   Run through 100,000 simulations
+    print(f"Generating {numDays} random birthdays 100,000 times...")
+    input("Press Enter to begin...")
 
-#   Run through 100,000 simulations
-print(f"Generating {numDays} random birthdays 100,000 times...")
-input("Press Enter to begin...")
 
+    print("Let's run another 100,000 simulations.")
+    simMatch = 0    #How many simulations had matching birthdays in them
 
-print("Let's run another 100,000 simulations.")
-simMatch = 0    #How many simulations had matching birthdays in them
-
-for i in range(100_000):
-    #   Report on the progress every 10,000 simulations
-    if i % 10_000 == 0:
+    for i in range(0, 100_000, 10_000):
+        #   Report on the progress every 10,000 simulations
         print(f"{i} simulations ran...")
 
-    birthday = getBirthdays(numDays)
-
-    if getMatch(birthdays) != None:
-        simMatch += 1
-
-
-print("100,000 simulations run. ")
-
-print()
-# Display simulation results:
-
-probability = round(simMatch / 100_000 * 100, 2)
-
-print(f'Out of 100,000 simulations of {numDays} people\'s birthdays, there was a')
-print(f'matching birthday in that group {simMatch} times. This means')
-print(f'that {numDays} people have a {probability}% chance of')
-print('having a matching birthday in their group.\n')
-
-
+        simMatch += countMatches(numDays, 10_000)
+
+
+    print("100,000 simulations run. ")
+
+    print()
+    # Display simulation results:
+
+    probability = round(simMatch / 100_000 * 100, 2)
+
+    print(f'Out of 100,000 simulations of {numDays} people\'s birthdays, there was a')
+    print(f'matching birthday in that group {simMatch} times. This means')
+    print(f'that {numDays} people have a {probability}% chance of')
+    print('having a matching birthday in their group.\n')
+
+
+def benchmark(numDays, numTrials, seed=None, aliasTable=None, shared=2):
+    """ Times countMatches() on a single core and returns the trials per second """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    countMatches(numDays, numTrials, rng, aliasTable, shared)
+    return numTrials / (time.perf_counter() - start)
+
+
+def runCommandLine(argv=None):
+    """ Runs the non-interactive command line. Without --group-size (or
+    --benchmark) the interactive program is started instead. """
+    #   Only the command line needs argparse, so importing the module skips it
+    import argparse
+    parser = argparse.ArgumentParser(description='Birthday Paradox Monte Carlo simulation.')
+    parser.add_argument('-n', '--group-size', type=int,
+        help='number of birthdays in each group')
+    parser.add_argument('-t', '--trials', type=int, default=100_000,
+        help='number of simulations to run (default: 100,000)')
+    parser.add_argument('-s', '--seed', type=int,
+        help='seed for reproducible runs')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+        help='number of worker processes (default: 1)')
+    parser.add_argument('--benchmark', action='store_true',
+        help='report simulation throughput in trials/sec')
+    parser.add_argument('--report-every', type=int,
+        help='print a running estimate every N trials (single worker)')
+    parser.add_argument('--checkpoint',
+        help='save progress to this file and resume from it (single worker)')
+    parser.add_argument('--weights',
+        help='CSV of births per day of the year to draw birthdays from (see loadDayWeights)')
+    parser.add_argument('-k', '--shared', type=int, default=2,
+        help='count groups where this many people share a birthday (default: 2)')
+    args = parser.parse_args(argv)
+
+    if args.group_size is None and not args.benchmark:
+        main()
+        return
+
+    numDays = 23 if args.group_size is None else args.group_size
+    if numDays < 1 or args.trials < 1 or args.workers < 1:
+        parser.error('--group-size, --trials and --workers must be positive')
+    if args.shared < 2:
+        parser.error('--shared must be at least 2')
+    aliasTable = None
+    if args.weights is not None:
+        try:
+            aliasTable = makeAliasTable(loadDayWeights(args.weights))
+        except (OSError, ValueError) as error:
+            parser.error(str(error))
+    matchText = 'matching birthday' if args.shared == 2 else f'birthday shared by {args.shared} people'
+
+    if args.benchmark:
+        trialsPerSecond = benchmark(numDays, args.trials, args.seed, aliasTable, args.shared)
+        print(f'{args.trials} simulations of {numDays} birthdays: {trialsPerSecond:,.0f} trials/sec')
+        return
+
+    if args.report_every is not None or args.checkpoint is not None:
+        reportEvery = 1_000_000 if args.report_every is None else args.report_every
+        if reportEvery < 1:
+            parser.error('--report-every must be positive')
+        try:
+            for progress in iterSimulation(numDays, args.trials, reportEvery, args.seed,
+                                           args.checkpoint, aliasTable, args.shared):
+                print(f'{progress.trials} simulations ran: {progress.probability:.4%} '
+                      f'(+/- {progress.standardError:.4%}), '
+                      f'{progress.trialsPerSecond:,.0f} trials/sec')
+        except ValueError as error:
+            parser.error(str(error))
+        return
+
+    result = simulateParallel(numDays, args.trials, args.workers, args.seed, aliasTable, args.shared)
+    print(f'Out of {result.trials} simulations of {numDays} people\'s birthdays, there was a')
+    print(f'{matchText} {result.matches} times: {result.probability:.4%} '
+          f'(95% CI {result.low:.4%} - {result.high:.4%}).')
+
+
+#   If the program is run directly (instead of imported), run the program
+if __name__ == '__main__':
+    runCommandLine()
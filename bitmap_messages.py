@@ -12,10 +12,19 @@ you’d like. The binary simplicity of the space-or-­
 message-characters system makes it good for begin-
 ners.
 
+The bitmap is compiled once into a cache file next to it (see
+loadCompiled()), so later runs only read that.
+
 """
 
-from email import message
+import contextlib
+import functools
+import mmap
+import os
+import struct
 import sys
+import time
+from array import array
 
 # (!) Try changing this multiline string to any image you like:
 # There are 68 periods along the top and bottom of this string:
@@ -46,23 +55,325 @@ bitmap = """
                     
 ....................................................................
 """
-print('Bitmap Message, by Emmanuel Munyite')
-print('Enter the message to display with the bitmap.')
-message = input('> ')
+#   Spaces to slice the gaps between filled runs from
+SPACES = ' ' * 256
+
+
+#   Compiled bitmaps are cached in a file next to their source, named
+#   source + CACHE_SUFFIX. The header holds the magic bytes, the source's
+#   mtime (ns) and size, a hash of the bitmap text, the number of lines and
+#   of runs. Then come unsigned 32-bit arrays of each line's width, each
+#   line's number of runs, and the (start, end) of every run.
+CACHE_SUFFIX = '.bmc'
+CACHE_HEADER = struct.Struct('<4sqq16sII')
+CACHE_MAGIC = b'BMC1'
+CACHE_WORD = array('I')
+
+#   Bitmap files bigger than this are streamed instead of cached
+CACHE_MAX_SIZE = 1 << 20
+
+#   ANSI escape codes for the scrolling animation
+CLEAR_SCREEN = '\x1b[2J\x1b[H'
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+
+
+@functools.lru_cache(maxsize=None)
+def getFilledRun():
+    """ Returns the pattern of a run of cells that are not spaces """
+    #   re is only needed to compile a bitmap, which a cached run skips
+    import re
+    return re.compile('[^ ]+')
+
+
+def compileLine(line):
+    """ Returns (width, runs) for one line of a bitmap, where runs is a
+    tuple of (start, end) columns of the cells that are not spaces """
+    return len(line), tuple(match.span() for match in getFilledRun().finditer(line))
+
+
+@functools.lru_cache(maxsize=None)
+def compileBitmap(bitmap):
+    """ Returns the bitmap compiled into a tuple with one compileLine()
+    pair per line. This is only worked out once per bitmap. """
+    return tuple(map(compileLine, bitmap.splitlines()))
+
+
+def getSpaces(count):
+    """ Returns a string of count spaces """
+    return SPACES[:count] if count <= len(SPACES) else ' ' * count
+
+
+def getTiledMessage(message, width):
+    """ Returns the message repeated to at least width characters. The
+    message character for column i is message[i % len(message)], so this
+    one string covers every column. """
+    return message * (width // len(message) + 1)
+
+
+def renderLine(width, runs, tiled):
+    """ Returns one compiled line drawn with a tiled message """
+    parts = []
+    column = 0
+    for start, end in runs:
+        parts.append(getSpaces(start - column))
+        parts.append(tiled[start:end])
+        column = end
+    parts.append(getSpaces(width - column))
+    return ''.join(parts)
+
+
+def renderBitmap(message, bitmap=bitmap):
+    """ Returns the whole bitmap as one string, with every cell that isn't
+    a space replaced by the message character for its column """
+    return renderCompiled(message, compileBitmap(bitmap))
+
+
+def renderCompiled(message, compiled):
+    """ Returns a bitmap compiled by compileBitmap() drawn with message, as
+    renderBitmap() does """
+    tiled = getTiledMessage(message, max((width for width, runs in compiled), default=0))
+    lines = [renderLine(width, runs, tiled) for width, runs in compiled]
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def getDigest(text):
+    """ Returns the hash a cache file keeps of the bitmap text """
+    #   Only needed when a cache is out of date, so it doesn't slow down
+    #   every start up
+    import hashlib
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def packCompiled(compiled, mtime, size, digest):
+    """ Returns the bytes of a cache file for a compiled bitmap """
+    widths = array('I', [width for width, runs in compiled])
+    runCounts = array('I', [len(runs) for width, runs in compiled])
+    spans = array('I', [column for width, runs in compiled for run in runs for column in run])
+    header = CACHE_HEADER.pack(CACHE_MAGIC, mtime, size, digest, len(widths), len(spans) // 2)
+    return header + widths.tobytes() + runCounts.tobytes() + spans.tobytes()
+
+
+def unpackCompiled(data):
+    """ Returns (mtime, size, digest, compiled) from the bytes of a cache
+    file, or None if they are not a whole cache file """
+    if len(data) < CACHE_HEADER.size:
+        return None
+    magic, mtime, size, digest, numLines, numRuns = CACHE_HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or len(data) != CACHE_HEADER.size + (2 * numLines + 2 * numRuns) * CACHE_WORD.itemsize:
+        return None
+    words = array('I', data[CACHE_HEADER.size:])
+    compiled = []
+    position = 2 * numLines
+    for width, runCount in zip(words[:numLines], words[numLines:2 * numLines]):
+        spans = words[position:position + 2 * runCount]
+        compiled.append((width, tuple(zip(spans[::2], spans[1::2]))))
+        position += 2 * runCount
+    return mtime, size, digest, tuple(compiled)
 
-if message == '':
-    sys.exit()
 
-#   Else we want to loop over each line
-for line in bitmap.splitlines():
+def loadCompiled(sourcePath, getLines):
+    """ Returns the compiled bitmap for a source file, from the cache file
+    next to it when that is up to date. getLines() returns the lines of the
+    bitmap, and is only called when the cache is missing or out of date.
 
-    #   Then loop over each character in the line:
-    for i,bit in enumerate(line):
-        if bit == ' ':
-            #   If the bit in the nitmap image is an empty space, print an empty space
-            print(' ',end="")
+    The cache is up to date when the source has the same mtime and size,
+    or (after a touch or a copy) when the bitmap text has the same hash. """
+    status = os.stat(sourcePath)
+    cachePath = sourcePath + CACHE_SUFFIX
+    try:
+        with open(cachePath, 'rb') as cacheFile:
+            cached = unpackCompiled(cacheFile.read())
+    except OSError:
+        cached = None
+    if cached is not None and cached[:2] == (status.st_mtime_ns, status.st_size):
+        return cached[3]
+
+    lines = getLines()
+    digest = getDigest('\n'.join(lines))
+    if cached is not None and cached[2] == digest:
+        compiled = cached[3]
+    else:
+        compiled = tuple(map(compileLine, lines))
+
+    #   Write to a temporary file first so another run never reads a
+    #   half-written cache. A cache that can't be written is just skipped.
+    temporaryPath = f'{cachePath}.{os.getpid()}.tmp'
+    try:
+        with open(temporaryPath, 'wb') as cacheFile:
+            cacheFile.write(packCompiled(compiled, status.st_mtime_ns, status.st_size, digest))
+        os.replace(temporaryPath, cachePath)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(temporaryPath)
+    return compiled
+
+
+def loadBitmapFile(path):
+    """ Returns the compiled bitmap in the file at path, using its cache """
+    return loadCompiled(path, lambda: list(iterBitmapFile(path)))
+
+
+def loadBuiltinBitmap():
+    """ Returns the compiled built-in bitmap, using a cache next to this
+    file (which is out of date whenever the bitmap string is changed) """
+    return loadCompiled(__file__, bitmap.splitlines)
+
+
+def iterBitmapFile(path):
+    """ Yields the lines of a bitmap file one at a time. The file is read
+    through mmap, so only the current line is ever held in memory. """
+    with open(path, 'rb') as bitmapFile:
+        if os.fstat(bitmapFile.fileno()).st_size == 0:
+            return
+        with mmap.mmap(bitmapFile.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            size = len(mapped)
+            while start < size:
+                end = mapped.find(b'\n', start)
+                if end == -1:
+                    end = size
+                yield mapped[start:end].rstrip(b'\r').decode('utf-8')
+                start = end + 1
+
+
+def streamBitmapFile(path, message, out=sys.stdout, bufferSize=1 << 16):
+    """ Writes the bitmap in the file at path drawn with message to out,
+    line by line, in writes of about bufferSize characters. Memory use
+    depends on the longest line, not on the size of the file. """
+    buffered = []
+    bufferedSize = 0
+    tiled = ''
+    for line in iterBitmapFile(path):
+        width, runs = compileLine(line)
+        if width > len(tiled):
+            tiled = getTiledMessage(message, width)
+        buffered.append(renderLine(width, runs, tiled))
+        buffered.append('\n')
+        bufferedSize += width + 1
+        if bufferedSize >= bufferSize:
+            out.write(''.join(buffered))
+            buffered.clear()
+            bufferedSize = 0
+    out.write(''.join(buffered))
+
+
+def getPhaseMessage(message, phase):
+    """ Returns the message turned so that column i of the bitmap shows
+    message[(i + phase) % len(message)] """
+    phase %= len(message)
+    return message[phase:] + message[:phase]
+
+
+@functools.lru_cache(maxsize=256)
+def getFrameDiff(message, phase, bitmap=bitmap):
+    """ Returns the ANSI codes that turn the frame at phase into the frame
+    at phase + 1, for a bitmap drawn from the top left of the screen.
+
+    Only the cells whose character changes are written, one cursor move per
+    changed stretch of a run (stretches a few cells apart are joined).
+    Frames repeat every len(message) steps, so there are only that many
+    different diffs, and each is worked out once. """
+    before = getPhaseMessage(message, phase)
+    after = getPhaseMessage(message, phase + 1)
+    compiled = compileBitmap(bitmap)
+    width = max((width for width, runs in compiled), default=0)
+    #   '*' marks the columns whose character changes between the frames
+    changed = getTiledMessage(''.join(' ' if a == b else '*' for a, b in zip(before, after)), width)
+    tiled = getTiledMessage(after, width)
+
+    filledRun = getFilledRun()
+    parts = []
+    for row, (width, runs) in enumerate(compiled, 1):
+        for start, end in runs:
+            stretches = []
+            for match in filledRun.finditer(changed, start, end):
+                column, columnEnd = match.span()
+                #   Rewriting a few unchanged cells is shorter than moving
+                #   the cursor past them
+                if stretches and column - stretches[-1][1] < len(f'\x1b[{row};{column + 1}H'):
+                    stretches[-1][1] = columnEnd
+                else:
+                    stretches.append([column, columnEnd])
+            for column, columnEnd in stretches:
+                parts.append(f'\x1b[{row};{column + 1}H')
+                parts.append(tiled[column:columnEnd])
+    return ''.join(parts)
+
+
+def animate(message, bitmap=bitmap, fps=10, numFrames=None, out=sys.stdout):
+    """ Scrolls the message through the bitmap, fps frames a second, until
+    numFrames frames have been shown (or forever if it's None). The first
+    frame is drawn in full, then each frame only redraws what changed. """
+    numRows = len(compileBitmap(bitmap))
+    delay = 1 / fps
+    out.write(CLEAR_SCREEN + HIDE_CURSOR + renderBitmap(message, bitmap))
+    out.flush()
+    try:
+        nextFrame = time.perf_counter()
+        phase = 0
+        while numFrames is None or phase + 1 < numFrames:
+            nextFrame += delay
+            time.sleep(max(0.0, nextFrame - time.perf_counter()))
+            out.write(getFrameDiff(message, phase % len(message), bitmap))
+            out.flush()
+            phase += 1
+    except KeyboardInterrupt:
+        pass    # Ctrl-C stops the animation.
+    finally:
+        #   Put the cursor back below the bitmap
+        out.write(f'\x1b[{numRows + 1};1H' + SHOW_CURSOR)
+        out.flush()
+
+
+def parseArguments(argv):
+    """ Returns the (file, scroll, fps) command line options in argv """
+    import argparse
+    parser = argparse.ArgumentParser(description='Draw a message inside a bitmap.')
+    parser.add_argument('file', nargs='?',
+        help='bitmap file to use instead of the world map, such as bitmap.txt')
+    parser.add_argument('--scroll', action='store_true',
+        help='scroll the message through the bitmap until Ctrl-C is pressed')
+    parser.add_argument('--fps', type=float, default=10,
+        help='frames a second when scrolling (default: 10)')
+    args = parser.parse_args(argv)
+    if args.fps <= 0:
+        parser.error('--fps must be positive')
+    return args.file, args.scroll, args.fps
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    #   Importing argparse (and the re module it needs) takes longer than
+    #   drawing a cached bitmap, so a run without options skips it
+    bitmapPath, scroll, fps = parseArguments(argv) if argv else (None, False, 10)
+
+    print('Bitmap Message, by Emmanuel Munyite')
+    print('Enter the message to display with the bitmap.')
+    message = input('> ')
+
+    if message == '':
+        sys.exit()
+
+    if scroll:
+        #   The animation redraws cells all over the bitmap, so it needs the
+        #   whole bitmap in memory
+        if bitmapPath is not None:
+            with open(bitmapPath, encoding='utf-8') as bitmapFile:
+                animate(message, bitmapFile.read(), fps)
         else:
-            print(message[i % len(message)],end="")
-    
-    #   print a new line
-    print()
+            animate(message, fps=fps)
+    elif bitmapPath is not None and os.path.getsize(bitmapPath) > CACHE_MAX_SIZE:
+        #   Draw a big file's bitmap a line at a time as it is read
+        streamBitmapFile(bitmapPath, message)
+    else:
+        #   Build the whole picture first, then write it out in one go
+        compiled = loadBuiltinBitmap() if bitmapPath is None else loadBitmapFile(bitmapPath)
+        sys.stdout.write(renderCompiled(message, compiled))
+
+
+#   If the program is run directly (instead of imported), run the program
+if __name__ == '__main__':
+    main()
@@ -14,7 +14,6 @@ Tags: large, game, card game
 
 
 import random
-from socket import BTPROTO_RFCOMM
 import sys
 
 #   Set up the constants:
@@ -26,8 +25,62 @@ CLUBS    = chr(9827)      # Unicode 9827 is '♣'.
 #   For printing the back of the cards
 BACKSIDE = 'backside'
 
-
-def main ():
+#   Points for each rank, an Ace starts out as 11 and drops to 1 if needed:
+RANK_POINTS = {'J': 10, 'Q': 10, 'K': 10, 'A': 11}
+for rank in range(2, 11):
+    RANK_POINTS[str(rank)] = rank
+
+#   A hand is kept as a single number, its total * 2 plus 1 if an Ace in it
+#   still counts as 11 (a "soft" hand). HAND_TRANSITIONS[hand * 12 + points]
+#   is the hand after drawing a card worth points, so adding a card never
+#   needs to look at the cards already in the hand. Only hands of 21 or
+#   less can take another card.
+EMPTY_HAND = 0
+HAND_TRANSITIONS = []
+for hand in range(44):
+    for points in range(12):
+        total, isSoft = hand >> 1, hand & 1
+        total += points
+        if points == 11:
+            if isSoft:
+                total -= 10     # Only one Ace can count as 11.
+            isSoft = 1
+        if total > 21 and isSoft:
+            total -= 10
+            isSoft = 0
+        HAND_TRANSITIONS.append(total * 2 + isSoft)
+HAND_TRANSITIONS = tuple(HAND_TRANSITIONS)
+
+#   The final dealer totals, DEALER_BUST stands for any total over 21:
+DEALER_TOTALS = (17, 18, 19, 20, 21)
+DEALER_BUST = 22
+
+#   The chance of drawing each number of points from a full deck:
+FULL_DECK_ODDS = {points: 1 / 13 for points in range(2, 10)}
+FULL_DECK_ODDS[10] = 4 / 13
+FULL_DECK_ODDS[11] = 1 / 13
+
+#   All 52 cards in a fixed order, suit by suit in RANK_POINTS order (not the
+#   order getDeck() builds them in). Seeded shoes depend on this order:
+CARDS = tuple((rank, suit) for suit in (HEARTS, DIAMONDS, CLUBS, SPADES) for rank in RANK_POINTS)
+
+#   Hi-Lo count values, indexed by points: low cards leaving the shoe are
+#   good for the player, tens and Aces leaving it are bad:
+HI_LO = tuple(1 if points <= 6 else -1 if points >= 10 else 0 for points in range(12))
+
+#   The shoe the cards are dealt from:
+NUM_DECKS = 6           # Number of decks shuffled together
+PENETRATION = 0.75      # Fraction of the shoe dealt before the cut card
+
+
+def main (hints=None, render=True, shoe=None, history=None, counter=None):
+    """Play the game. hints is an optional function hints(playerHand,
+    dealerHand, canDouble) that returns the suggested move to show. With
+    render=False the cards are not drawn, only the hand totals. shoe is
+    the Shoe to deal from (a new one by default), and every round is
+    recorded to history if it is given (see blackjack_history.py). With
+    a CardCounter as counter, the count of the cards the player has seen
+    face up is shown before each move."""
     print(
     """
         ♣ Blackjack Card Game by Emmanuel Munyite ♣
@@ -60,6 +113,12 @@ def main ():
 
     
     money = 5000    # Starting balance
+    if shoe is None:
+        shoe = Shoe()   # The cards are dealt from a shoe that is reshuffled at the cut card
+    if counter is not None and counter.numDecks * 52 != len(shoe.cards):
+        raise ValueError('the counter must be for the same number of decks as the shoe')
+    roundNumber = 0
+    countedShuffles = shoe.shuffles
 
     while True:  # Main game loop.
         # Check if the player has run out of money:
@@ -74,23 +133,56 @@ def main ():
         print(f'Money: ${money}')
         bet = getBet(money)
 
-        # Give the dealer and player two cards from the deck each:
-        deck = getDeck()
-        dealerHand = [deck.pop(), deck.pop()]
-        playerHand = [deck.pop(), deck.pop()]
+        # Reshuffle once the cut card has come out:
+        if shoe.needsShuffle():
+            print('The cut card came out, shuffling the shoe...')
+            shoe.shuffle()
+        if counter is not None and shoe.shuffles != countedShuffles:
+            counter.reset()
+            countedShuffles = shoe.shuffles
+
+        # Remember where in the shoe this round started, for the history:
+        roundNumber += 1
+        moneyBefore = money
+        shuffles, position = shoe.shuffles, shoe.position
+        moves = ''
+        firstBet = bet
+
+        # Give the dealer and player two cards from the shoe each:
+        dealerHand = [shoe.pop(), shoe.pop()]
+        playerHand = [shoe.pop(), shoe.pop()]
+
+        # Keep running totals so the hands never need to be added up again:
+        dealerState = addRankedCard(addRankedCard(EMPTY_HAND, dealerHand[0]), dealerHand[1])
+        playerState = addRankedCard(addRankedCard(EMPTY_HAND, playerHand[0]), playerHand[1])
+        if counter is not None:
+            # Only the cards face up can be counted, the dealer's first card is hidden:
+            for card in playerHand + dealerHand[1:]:
+                counter.see(card)
 
         # Handle player actions:
         print('Bet:', bet)
         while True:  # Keep looping until player stands or busts.
-            displayHands(playerHand, dealerHand, False)
+            displayHands(playerHand, dealerHand, False, render)
             print()
 
             # Check if the player has bust:
-            if getHandValue(playerHand) > 21:
+            if getTotal(playerState) > 21:
                 break
 
+            if counter is not None:
+                upcard = RANK_POINTS[dealerHand[1][0]]
+                tens = counter.getPointOdds()[10]
+                print(f'Count: {counter.runningCount:+} running, {counter.getTrueCount():+.1f} true, '
+                      f'next card worth 10: {tens:.1%}, '
+                      f'dealer busts: {counter.getDealerBustOdds(upcard):.1%}')
+
             # Get the player's move, either H, S, or D:
-            move = getMove(playerHand, money - bet)
+            hint = None
+            if hints is not None:
+                hint = hints(playerHand, dealerHand, len(playerHand) == 2 and money - bet > 0)
+            move = getMove(playerHand, money - bet, hint)
+            moves += move
 
             # Handle the player actions:
             if move == 'D':
@@ -102,12 +194,15 @@ def main ():
 
             if move in ('H', 'D'):
                 # Hit/doubling down takes another card.
-                newCard = deck.pop()
+                newCard = shoe.pop()
                 rank, suit = newCard
                 print(f'You drew a {rank} of {suit}.')
                 playerHand.append(newCard)
+                playerState = addRankedCard(playerState, newCard)
+                if counter is not None:
+                    counter.see(newCard)
 
-                if getHandValue(playerHand) > 21:
+                if getTotal(playerState) > 21:
                     # The player has busted:
                     continue
 
@@ -116,24 +211,29 @@ def main ():
                 break
 
         # Handle the dealer's actions:
-        if getHandValue(playerHand) <= 21:
-            while getHandValue(dealerHand) < 17:
+        if getTotal(playerState) <= 21:
+            while getTotal(dealerState) < 17:
                 # The dealer hits:
                 print('Dealer hits...')
-                dealerHand.append(deck.pop())
-                displayHands(playerHand, dealerHand, False)
+                dealerHand.append(shoe.pop())
+                dealerState = addRankedCard(dealerState, dealerHand[-1])
+                if counter is not None:
+                    counter.see(dealerHand[-1])
+                displayHands(playerHand, dealerHand, False, render)
 
-                if getHandValue(dealerHand) > 21:
+                if getTotal(dealerState) > 21:
                     break  # The dealer has busted.
                 
                 input('Press Enter to continue...')
                 print('\n\n')
 
         # Show the final hands:
-        displayHands(playerHand, dealerHand, True)
+        displayHands(playerHand, dealerHand, True, render)
+        if counter is not None:
+            counter.see(dealerHand[0])  # The dealer's first card is turned over.
 
-        playerValue = getHandValue(playerHand)
-        dealerValue = getHandValue(dealerHand)
+        playerValue = getTotal(playerState)
+        dealerValue = getTotal(dealerState)
         # Handle whether the player won, lost, or tied:
         if dealerValue > 21:
             print('Dealer busts! You win ${}!'.format(bet))
@@ -147,6 +247,12 @@ def main ():
         elif playerValue == dealerValue:
             print('It\'s a tie, the bet is returned to you.')
 
+        if history is not None:
+            history.record(roundNumber, shuffles, position, moneyBefore, firstBet,
+                money - moneyBefore, playerValue, dealerValue,
+                [RANK_POINTS[rank] for rank, suit in playerHand],
+                [RANK_POINTS[rank] for rank, suit in dealerHand], moves)
+
         input('Press Enter to continue...')
         print('\n\n')
 
@@ -184,26 +290,155 @@ def getDeck():
         
     random.shuffle(deck)
     return deck
-    
 
 
-
-
-def displayHands(playerHand, dealerHand, showDealerHand):
+class Shoe:
+    """A shoe of numDecks shuffled decks with a cut card placed after
+    penetration of the cards. Cards are dealt with pop() like from the
+    getDeck() list, but from a list that is built once and reshuffled in
+    place only when shuffle() is called.
+
+    faces are the 52 values that make up one deck, by default the
+    (rank, suit) tuples in CARDS. shuffles counts how many times the shoe
+    has been shuffled, so that together with position and the seed of rng
+    any point in the shoe can be found again.
+
+    counter is an optional CardCounter for the same number of decks that
+    sees every card dealt, and is reset when the shoe is shuffled."""
+
+    def __init__(self, numDecks=NUM_DECKS, penetration=PENETRATION, faces=None, rng=random,
+                 counter=None):
+        if numDecks < 1:
+            raise ValueError('numDecks must be at least 1')
+        if not 0 < penetration <= 1:
+            raise ValueError('penetration must be more than 0 and at most 1')
+        if faces is None:
+            faces = CARDS
+        self.cards = list(faces) * numDecks
+        self.cutCard = max(1, int(len(self.cards) * penetration))
+        self.rng = rng
+        if counter is not None and counter.numDecks != numDecks:
+            raise ValueError('the counter must be for the same number of decks as the shoe')
+        self.counter = counter
+        self.shuffles = 0
+        self.shuffle()
+
+    def __len__(self):
+        """Returns the number of cards left in the shoe."""
+        return len(self.cards) - self.position
+
+    def shuffle(self):
+        """Put every card back and shuffle the shoe."""
+        self.rng.shuffle(self.cards)
+        self.position = 0
+        self.shuffles += 1
+        if self.counter is not None:
+            self.counter.reset()
+
+    def needsShuffle(self):
+        """Returns True once the cut card has been reached."""
+        return self.position >= self.cutCard
+
+    def pop(self):
+        """Deal the next card. An empty shoe is reshuffled straight away."""
+        if self.position == len(self.cards):
+            self.shuffle()
+        card = self.cards[self.position]
+        self.position += 1
+        if self.counter is not None:
+            self.counter.see(card)
+        return card
+
+
+class CardCounter:
+    """Keeps track of the cards left in a shoe of numDecks decks as cards
+    are seen: how many of each rank and points value are left and the
+    Hi-Lo running count. Seeing a card is O(1), and the odds are worked
+    out from the counts kept, never from the list of cards.
+
+    Cards can be (rank, suit) tuples, or points like the shoes of
+    blackjack_sim deal. A card seen as points has no rank (a 10 could be
+    a J, Q or K), so getRankOdds() is only for counters that have seen
+    (rank, suit) cards since the last reset()."""
+
+    def __init__(self, numDecks=NUM_DECKS):
+        if numDecks < 1:
+            raise ValueError('numDecks must be at least 1')
+        self.numDecks = numDecks
+        self.reset()
+
+    def reset(self):
+        """Start again from a full shoe."""
+        self.rankCounts = dict.fromkeys(RANK_POINTS, 4 * self.numDecks)
+        self.pointCounts = [0] * 12     # Indexed by points, 2 to 11
+        for rank, points in RANK_POINTS.items():
+            self.pointCounts[points] += 4 * self.numDecks
+        self.cardsLeft = 52 * self.numDecks
+        self.runningCount = 0
+        self.ranksKnown = True
+
+    def see(self, card):
+        """Take a card, a (rank, suit) tuple or its points, out of the
+        cards left."""
+        if card.__class__ is int:
+            points = card
+            self.ranksKnown = False
+        else:
+            rank = card[0]
+            points = RANK_POINTS[rank]
+            if not self.rankCounts[rank]:
+                raise ValueError(f'there are no more {rank} cards left to see')
+            self.rankCounts[rank] -= 1
+        if not self.pointCounts[points]:
+            raise ValueError(f'there are no more cards worth {points} left to see')
+        self.pointCounts[points] -= 1
+        self.cardsLeft -= 1
+        self.runningCount += HI_LO[points]
+
+    def getTrueCount(self):
+        """Returns the running count per deck left in the shoe."""
+        return self.runningCount * 52 / max(self.cardsLeft, 1)
+
+    def getRankOdds(self):
+        """Returns a dict of the chance of the next card being each rank."""
+        if not self.ranksKnown:
+            raise ValueError('cards were seen as points, so their ranks are not known')
+        cardsLeft = max(self.cardsLeft, 1)
+        return {rank: count / cardsLeft for rank, count in self.rankCounts.items()}
+
+    def getPointOdds(self):
+        """Returns a dict of the chance of the next card being worth each
+        number of points, as used by getDealerOdds()."""
+        cardsLeft = max(self.cardsLeft, 1)
+        return {points: self.pointCounts[points] / cardsLeft for points in range(2, 12)}
+
+    def getDealerBustOdds(self, upcard):
+        """Returns the chance of the dealer busting when showing a card
+        worth upcard points. The cards the dealer draws are taken to come
+        from the cards left in the same proportions."""
+        return getDealerOdds(upcard, self.getPointOdds())[DEALER_BUST]
+
+
+def displayHands(playerHand, dealerHand, showDealerHand, render=True):
     """Show the player's and dealer's cards. Hide the dealer's first
-    card if showDealerHand is False."""
-    print()
+    card if showDealerHand is False. With render=False only the totals
+    are shown, not the cards."""
     if showDealerHand:
-        print('DEALER:', getHandValue(dealerHand))
-        displayCards(dealerHand)
+        dealerLabel = f'DEALER: {getHandValue(dealerHand)}'
+        dealerCards = dealerHand
     else:
-        print('DEALER: ???')
+        dealerLabel = 'DEALER: ???'
         # Hide the dealer's first card:
-        displayCards([BACKSIDE] + dealerHand[1:])
+        dealerCards = [BACKSIDE] + dealerHand[1:]
+    playerLabel = f'PLAYER: {getHandValue(playerHand)}'
 
-    # Show the player's cards:
-    print('PLAYER:', getHandValue(playerHand))
-    displayCards(playerHand)
+    # Build the whole frame and write it in one go:
+    if render:
+        frame = ['', dealerLabel, getCardsText(dealerCards), playerLabel, getCardsText(playerHand)]
+    else:
+        frame = ['', f'{dealerLabel}    {playerLabel}']
+    frame.append('')
+    sys.stdout.write('\n'.join(frame))
 
 
 def getHandValue(cards):
@@ -212,55 +447,101 @@ def getHandValue(cards):
 
     #   cards is a list, containing a tuple of cards
 
-    value = 0
-    numberOfAces = 0
+    hand = EMPTY_HAND
+    for i, (rank, suit) in enumerate(cards):
+        hand = addCard(hand, RANK_POINTS[rank])
+        if getTotal(hand) > 21:
+            # The hand is bust, so any cards after this only add up (Aces as 1):
+            return getTotal(hand) + sum(
+                1 if rank == 'A' else RANK_POINTS[rank] for rank, suit in cards[i + 1:])
+    return getTotal(hand)
+
+
+def addCard(hand, points):
+    """Returns the hand (see HAND_TRANSITIONS) after drawing a card worth points."""
+    return HAND_TRANSITIONS[hand * 12 + points]
+
+
+def addRankedCard(hand, card):
+    """Returns the hand after drawing card, a (rank, suit) tuple."""
+    return HAND_TRANSITIONS[hand * 12 + RANK_POINTS[card[0]]]
+
+
+def getTotal(hand):
+    """Returns the best total of a hand kept as a HAND_TRANSITIONS number."""
+    return hand >> 1
 
-    # Add the value for the non-ace cards:
-    for card in cards:
-        rank = card[0]  # card is a tuple like (rank, suit)
-        if rank == 'A':
-            numberOfAces += 1
-        elif rank in ('K', 'Q', 'J'):  # Face cards are worth 10 points.
-            value += 10
-        else:
-            value += int(rank)  # Numbered cards are worth their number.
 
-    # Add the value for the aces:
-    value += numberOfAces  # Add 1 per ace.
-    for i in range(numberOfAces):
-        # If another 10 can be added without busting, do so thus Ace will be 11:
-        if value + 10 <= 21:
-            value += 10
+def isSoft(hand):
+    """Returns True if an Ace in the hand is counted as 11."""
+    return hand & 1 == 1
 
-    return value
+
+def getDealerOdds(upcard, cardOdds=FULL_DECK_ODDS):
+    """Returns a dict of the chance of the dealer finishing on each of
+    DEALER_TOTALS or DEALER_BUST when showing a card worth upcard points.
+    cardOdds maps points to the chance of drawing them, the default is an
+    endless supply of full decks."""
+    finalOdds = dict.fromkeys(DEALER_TOTALS + (DEALER_BUST,), 0.0)
+    stillDrawing = {addCard(EMPTY_HAND, upcard): 1.0}
+
+    #   Keep drawing for every hand the dealer could still be holding
+    while stillDrawing:
+        nextDrawing = {}
+        for hand, chance in stillDrawing.items():
+            for points, pointsChance in cardOdds.items():
+                nextHand = addCard(hand, points)
+                total = getTotal(nextHand)
+                if total > 21:
+                    finalOdds[DEALER_BUST] += chance * pointsChance
+                elif total >= 17:
+                    finalOdds[total] += chance * pointsChance
+                else:
+                    nextDrawing[nextHand] = nextDrawing.get(nextHand, 0.0) + chance * pointsChance
+        stillDrawing = nextDrawing
+
+    return finalOdds
+
+
+#   The dealer's final total odds for each upcard with full decks:
+DEALER_ODDS = {upcard: getDealerOdds(upcard) for upcard in range(2, 12)}
+
+
+def getCardText(card):
+    """Returns the rows of text that draw card, or BACKSIDE, as a tuple
+    of strings."""
+    if card == BACKSIDE:
+        # Draw a card's back:
+        return (' ___  ', '|## | ', '|###| ', '|_##| ')
+
+    # Draw the card's front:
+    rank, suit = card  # The card is a tuple data structure.
+    return (' ___  ', '|{} | '.format(rank.ljust(2)), '| {} | '.format(suit),
+            '|_{}| '.format(rank.rjust(2, '_')))
+
+
+#   The rows of text for every card face and the back, drawn only once:
+CARD_TEXT = {card: getCardText(card) for card in CARDS}
+CARD_TEXT[BACKSIDE] = getCardText(BACKSIDE)
+
+
+def getCardsText(cards):
+    """Returns the text that draws all the cards in the cards list side by side."""
+    cardRows = [CARD_TEXT.get(card) or getCardText(card) for card in cards]
+    # The text to display on each row, with an empty fifth row like before:
+    return '\n'.join(''.join(rows) for rows in zip(*cardRows)) + '\n' if cardRows else '\n' * 4
 
 
 def displayCards(cards):
     """Display all the cards in the cards list."""
-    rows = ['', '', '', '', '']  # The text to display on each row.
-
-    for card in cards:
-        rows[0] += ' ___  '  # Print the top line of the card.
-        if card == BACKSIDE:
-            # Print a card's back:
-            rows[1] += '|## | '
-            rows[2] += '|###| '
-            rows[3] += '|_##| '
-        else:
-            # Print the card's front:
-            rank, suit = card  # The card is a tuple data structure.
-            rows[1] += '|{} | '.format(rank.ljust(2))
-            rows[2] += '| {} | '.format(suit)
-            rows[3] += '|_{}| '.format(rank.rjust(2, '_'))
-
-    # Print each row on the screen:
-    for row in rows:
-        print(row)
+    sys.stdout.write(getCardsText(cards) + '\n')
 
 
-def getMove(playerHand, money):
+def getMove(playerHand, money, hint=None):
     """Asks the player for their move, and returns 'H' for hit, 'S' for
-    stand, and 'D' for double down."""
+    stand, and 'D' for double down. If a hint is given it is shown first."""
+    if hint is not None:
+        print(f'Hint: {hint}')
     while True:  # Keep looping until the player enters a correct move.
         # Determine what moves the player can make:
         moves = ['(H)it', '(S)tand']
@@ -0,0 +1,282 @@
+"""
+Blackjack Hand History, by Emmanuel Munyite
+Records every Blackjack round to an append-only binary file, and reads
+the files back to sum up or re-play millions of recorded hands.
+
+A history file starts with a header (the magic bytes BJH2, the number of
+decks and the penetration) followed by one fixed size record per round:
+
+    1 int64 column:   the seed of the session's shoe
+    9 int32 columns:  session, round, shuffles, position, moneyBefore,
+                      bet (before any double down), result (money won or
+                      lost), playerTotal, dealerTotal
+    3 x 12 bytes:     the player's cards, the dealer's cards (as points,
+                      2 to 11, padded with 0) and the moves made (H, S, D)
+
+Each time a file is written to (a session) a new shoe is used, so every
+session has its own number and seed. shuffles and position say where in
+that shoe the round started, so with the seed the exact cards of any
+round can be dealt again. Because every record is the same size, a file
+is read through mmap as one long array of int32 (or int64 for the seed),
+and a column is just a strided slice of it. Summing up a file never
+builds an object per hand.
+
+Tags: large, game, card game, simulation
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+
+import blackjack
+import blackjack_sim
+from blackjack import EMPTY_HAND, HAND_TRANSITIONS, NUM_DECKS, PENETRATION, Shoe
+
+HEADER = struct.Struct('<4sid4x')      # magic, numDecks, penetration
+RECORD = struct.Struct('<q9i12s12s12s')
+MAGIC = b'BJH2'
+MAX_CARDS = 12
+
+#   Each record is this many int32 values long, and these are the columns
+#   (the int64 seed takes up the first two). BET is the bet before any double
+#   down, and RESULT what the hand won or lost after it:
+RECORD_INTS = RECORD.size // 4
+(SESSION, ROUND, SHUFFLES, POSITION, MONEY_BEFORE, BET,
+ RESULT, PLAYER_TOTAL, DEALER_TOTAL) = range(2, 11)
+
+#   ... and this many int64 values long, with the seed first:
+RECORD_LONGS = RECORD.size // 8
+SEED = 0
+
+
+class HistoryWriter:
+    """Appends round records to a history file, as a new session played
+    with a shoe shuffled from seed. Use it as a context manager, or call
+    close() when done, to flush the last records."""
+
+    def __init__(self, path, seed, numDecks=NUM_DECKS, penetration=PENETRATION):
+        self.seed = seed
+        self.numDecks = numDecks
+        self.penetration = penetration
+        exists = checkHeader(path, numDecks, penetration)
+        self.session = getLastSession(path) + 1 if exists else 1
+        self.file = open(path, 'ab')
+        if not exists:
+            self.file.write(HEADER.pack(MAGIC, numDecks, penetration))
+
+    def record(self, roundNumber, shuffles, position, moneyBefore, bet, result,
+               playerTotal, dealerTotal, playerCards, dealerCards, moves):
+        """Append one round. Cards are given as points, moves as a string
+        or list of 'H', 'S' and 'D'."""
+        if len(playerCards) > MAX_CARDS or len(dealerCards) > MAX_CARDS:
+            raise ValueError(f'a hand can only be recorded with up to {MAX_CARDS} cards')
+        self.file.write(RECORD.pack(self.seed, self.session, roundNumber, shuffles,
+            position, moneyBefore, bet,
+            result, playerTotal, dealerTotal, bytes(playerCards), bytes(dealerCards),
+            ''.join(moves).encode('ascii')))
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excInfo):
+        self.close()
+
+
+def readHeader(path):
+    """Returns (numDecks, penetration) from a history file's header."""
+    with open(path, 'rb') as historyFile:
+        header = historyFile.read(HEADER.size)
+    if len(header) < HEADER.size or header[:4] != MAGIC:
+        raise ValueError(f'{path} is not a Blackjack history file')
+    magic, numDecks, penetration = HEADER.unpack(header)
+    return numDecks, penetration
+
+
+def checkHeader(path, numDecks=NUM_DECKS, penetration=PENETRATION):
+    """Returns True if path is a history file that rounds dealt from this
+    shoe can be appended to, or False if it is missing or empty. Raises
+    ValueError if it is anything else."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    if readHeader(path) != (numDecks, penetration):
+        raise ValueError(f'{path} was recorded with a different number of decks or penetration')
+    return True
+
+
+def getLastSession(path):
+    """Returns the session number of the last record in a history file,
+    or 0 if it has no records."""
+    numRecords = (os.path.getsize(path) - HEADER.size) // RECORD.size
+    if numRecords == 0:
+        return 0
+    with open(path, 'rb') as historyFile:
+        historyFile.seek(HEADER.size + (numRecords - 1) * RECORD.size)
+        return RECORD.unpack(historyFile.read(RECORD.size))[1]
+
+
+def openColumns(path):
+    """Returns (header, ints, mapped) for a history file: the header tuple,
+    a memoryview of every record as int32 values and the mmap behind it.
+    Column c of the records is ints[c::RECORD_INTS], and ints.cast('q')
+    holds the seeds at [SEED::RECORD_LONGS]. Release ints and close mapped
+    when done."""
+    header = readHeader(path)
+    with open(path, 'rb') as historyFile:
+        mapped = mmap.mmap(historyFile.fileno(), 0, access=mmap.ACCESS_READ)
+    numRecords = (len(mapped) - HEADER.size) // RECORD.size
+    ints = memoryview(mapped)[HEADER.size:HEADER.size + numRecords * RECORD.size].cast('i')
+    return header, ints, mapped
+
+
+def summarize(path):
+    """Returns a dict summing up every round in a history file."""
+    header, ints, mapped = openColumns(path)
+    try:
+        results = ints[RESULT::RECORD_INTS]
+        bets = ints[BET::RECORD_INTS]
+        hands = len(results)
+        summary = {
+            'hands': hands,
+            'totalBet': sum(bets),
+            'totalResult': sum(results),
+            'wins': sum(1 for result in results if result > 0),
+            'losses': sum(1 for result in results if result < 0),
+            'playerBusts': sum(1 for total in ints[PLAYER_TOTAL::RECORD_INTS] if total > 21),
+            'dealerBusts': sum(1 for total in ints[DEALER_TOTAL::RECORD_INTS] if total > 21),
+        }
+        summary['pushes'] = hands - summary['wins'] - summary['losses']
+        #   Per base bet: doubled down hands wagered more than their BET
+        summary['resultPerBet'] = summary['totalResult'] / summary['totalBet'] if hands else 0.0
+        del results, bets
+    finally:
+        ints.release()
+        mapped.close()
+    return summary
+
+
+def rerun(path, policy):
+    """Play every recorded round again from the same point in the shoe
+    with policy instead, and return (recordedValue, newValue): the total
+    won or lost by each in bets."""
+    (numDecks, penetration), ints, mapped = openColumns(path)
+    longs = ints.cast('B').cast('q')
+    shoe = None
+    session = None
+    recordedValue = newValue = 0.0
+    try:
+        for seed, roundSession, shuffles, position, bet, result in zip(longs[SEED::RECORD_LONGS],
+                ints[SESSION::RECORD_INTS], ints[SHUFFLES::RECORD_INTS],
+                ints[POSITION::RECORD_INTS], ints[BET::RECORD_INTS], ints[RESULT::RECORD_INTS]):
+            # Each session was dealt from its own shoe, which can't be
+            # wound back, so start it again from the seed when needed:
+            if roundSession != session or shuffles < shoe.shuffles:
+                shoe = Shoe(numDecks, penetration, blackjack_sim.DECK_POINTS, random.Random(seed))
+                session = roundSession
+            while shoe.shuffles < shuffles:
+                shoe.shuffle()
+            shoe.position = position
+            recordedValue += result / bet
+            newValue += blackjack_sim.playHand(policy, shoe)[0]
+    finally:
+        longs.release()
+        ints.release()
+        mapped.close()
+    return recordedValue, newValue
+
+
+def getTotalOf(cards):
+    """Returns the total of a hand of card points."""
+    hand = EMPTY_HAND
+    for points in cards:
+        hand = HAND_TRANSITIONS[hand * 12 + points]
+    return hand >> 1
+
+
+def recordSimulation(path, policy, numHands, seed, numDecks=NUM_DECKS, penetration=PENETRATION):
+    """Play numHands hands with a blackjack_sim policy and record them all
+    to path."""
+    shoe = Shoe(numDecks, penetration, blackjack_sim.DECK_POINTS, random.Random(seed))
+    with HistoryWriter(path, seed, numDecks, penetration) as history:
+        for roundNumber in range(1, numHands + 1):
+            if shoe.needsShuffle():
+                shoe.shuffle()
+            shuffles, position = shoe.shuffles, shoe.position
+            moves = []
+            result, playerBust, dealerBust = blackjack_sim.playHand(policy, shoe, moves=moves)
+
+            # The cards came out in the order: dealer, dealer, player, player,
+            # one for each hit or double down, then the dealer's hits.
+            dealt = shoe.cards[position:shoe.position]
+            numPlayerCards = 2 + sum(1 for move in moves if move != 'S')
+            playerCards = dealt[2:2 + numPlayerCards]
+            dealerCards = dealt[:2] + dealt[2 + numPlayerCards:]
+            history.record(roundNumber, shuffles, position, 0, 1, result,
+                getTotalOf(playerCards), getTotalOf(dealerCards), playerCards,
+                dealerCards, moves)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Record and replay Blackjack hand histories.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    play = commands.add_parser('play', help='play blackjack.py and record every round')
+    play.add_argument('file')
+    play.add_argument('-s', '--seed', type=int, help='seed for the shoe')
+
+    simulate = commands.add_parser('simulate', help='record hands played by a policy')
+    simulate.add_argument('file')
+    simulate.add_argument('-p', '--policy', choices=sorted(blackjack_sim.POLICIES), default='basic')
+    simulate.add_argument('-n', '--hands', type=int, default=100_000)
+    simulate.add_argument('-s', '--seed', type=int, help='seed for the shoe')
+
+    summary = commands.add_parser('summary', help='sum up a history file')
+    summary.add_argument('file')
+
+    replay = commands.add_parser('rerun', help='play recorded rounds again with another policy')
+    replay.add_argument('file')
+    replay.add_argument('-p', '--policy', choices=sorted(blackjack_sim.POLICIES), default='basic')
+
+    args = parser.parse_args(argv)
+    if args.command in ('play', 'simulate') and args.seed is None:
+        args.seed = random.SystemRandom().getrandbits(63)
+    try:
+        if args.command in ('play', 'simulate'):
+            checkHeader(args.file)
+        else:
+            readHeader(args.file)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    if args.command == 'play':
+        with HistoryWriter(args.file, args.seed) as history:
+            blackjack.main(shoe=Shoe(rng=random.Random(args.seed)), history=history)
+
+    elif args.command == 'simulate':
+        if args.hands < 1:
+            parser.error('--hands must be positive')
+        recordSimulation(args.file, blackjack_sim.POLICIES[args.policy], args.hands, args.seed)
+        print(f'Recorded {args.hands} hands to {args.file} (seed {args.seed}).')
+
+    elif args.command == 'summary':
+        result = summarize(args.file)
+        hands = result['hands'] or 1
+        print(f"{result['hands']} hands, {result['totalBet']} in base bets, "
+              f"{result['totalResult']:+} won ({result['resultPerBet']:+.4f} per base bet)")
+        print(f"Won {result['wins'] / hands:.2%}, tied {result['pushes'] / hands:.2%}, "
+              f"lost {result['losses'] / hands:.2%}")
+        print(f"Player busts: {result['playerBusts'] / hands:.2%}, "
+              f"dealer busts: {result['dealerBusts'] / hands:.2%}")
+
+    elif args.command == 'rerun':
+        recordedValue, newValue = rerun(args.file, blackjack_sim.POLICIES[args.policy])
+        print(f'Recorded play: {recordedValue:+.1f} bets, {args.policy}: {newValue:+.1f} bets')
+
+
+# If the program is run (instead of imported), run the history tool:
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""
+Blackjack Simulator, by Emmanuel Munyite
+Plays Blackjack hands without any input() or print() calls, so that
+playing strategies can be compared over millions of hands.
+
+The rules are the same as in blackjack.py: the dealer stands at 17,
+wins pay even money, ties return the bet, and the player may only double
+down on their first two cards. There is no splitting or insurance.
+
+A policy is a function policy(total, isSoft, dealerUpcard, canDouble)
+that returns 'H' to hit, 'S' to stand or 'D' to double down. Cards are
+stored as their points (2 to 10, and 11 for an Ace) instead of the
+(rank, suit) tuples used by the game.
+
+Tags: large, game, card game, simulation
+"""
+
+import argparse
+import os
+import random
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import blackjack_solver
+from blackjack import (CARDS, HAND_TRANSITIONS, NUM_DECKS, PENETRATION, RANK_POINTS,
+                       CardCounter, Shoe)
+
+
+#   The 52 cards of one deck as points, in the same order as blackjack.CARDS
+#   so a shoe with the same seed deals the same cards as the game's
+DECK_POINTS = tuple(RANK_POINTS[rank] for rank, suit in CARDS)
+
+SimulationResult = namedtuple('SimulationResult',
+    'hands expectedValue winRate pushRate lossRate playerBustRate dealerBustRate')
+
+#   The game's starting balance, from main() in blackjack.py
+STARTING_MONEY = 5000
+
+#   Sessions played by one call of simulateBankrollShard(). Each shard seeds
+#   its own Random from (seed, shard number), so how the shards are spread
+#   over the workers doesn't change which hands are dealt.
+SESSIONS_PER_SHARD = 10_000
+
+#   Final bankrolls are counted in buckets of this many dollars, so the
+#   memory used does not grow with the number of sessions
+BANKROLL_BUCKET = 100
+
+BankrollResult = namedtuple('BankrollResult',
+    'sessions riskOfRuin medianLength meanBankroll bankrollPercentiles')
+
+
+def alwaysStand(total, isSoft, dealerUpcard, canDouble):
+    """Never take another card."""
+    return 'S'
+
+
+def dealerMimic(total, isSoft, dealerUpcard, canDouble):
+    """Play like the dealer: hit below 17, stand at 17 or more."""
+    return 'H' if total < 17 else 'S'
+
+
+def basicStrategy(total, isSoft, dealerUpcard, canDouble):
+    """A hit/stand/double basic strategy for a dealer that stands at 17
+    (there is no splitting in this game)."""
+    if isSoft:
+        if total >= 19:
+            move = 'S'
+        elif total == 18:
+            if 3 <= dealerUpcard <= 6:
+                # Soft 18 stands when it can't double:
+                return 'D' if canDouble else 'S'
+            elif dealerUpcard <= 8:
+                return 'S'
+            else:
+                move = 'H'
+        elif total == 17:
+            move = 'D' if 3 <= dealerUpcard <= 6 else 'H'
+        elif total >= 15:
+            move = 'D' if 4 <= dealerUpcard <= 6 else 'H'
+        else:
+            move = 'D' if 5 <= dealerUpcard <= 6 else 'H'
+    else:
+        if total >= 17:
+            move = 'S'
+        elif total >= 13:
+            move = 'S' if dealerUpcard <= 6 else 'H'
+        elif total == 12:
+            move = 'S' if 4 <= dealerUpcard <= 6 else 'H'
+        elif total == 11:
+            move = 'D' if dealerUpcard <= 10 else 'H'
+        elif total == 10:
+            move = 'D' if dealerUpcard <= 9 else 'H'
+        elif total == 9:
+            move = 'D' if 3 <= dealerUpcard <= 6 else 'H'
+        else:
+            move = 'H'
+
+    if move == 'D' and not canDouble:
+        return 'H'
+    return move
+
+
+POLICIES = {
+    'stand': alwaysStand,
+    'dealer': dealerMimic,
+    'basic': basicStrategy,
+}
+
+
+def playHand(policy, deck, canDouble=True, moves=None):
+    """Play one hand from deck, a list or Shoe of card points to pop() from.
+    canDouble is False when the player can't afford to double down. If a
+    moves list is given, every move the policy makes is appended to it.
+    Returns (result, playerBust, dealerBust), where result is the number
+    of bets won (negative if lost)."""
+    pop = deck.pop
+    transitions = HAND_TRANSITIONS
+
+    # Give the dealer and player two cards from the deck each, the dealer's
+    # first card face down like main() does. Hands are kept as
+    # HAND_TRANSITIONS numbers: total * 2, plus 1 if soft. The empty hand
+    # is 0, so its row of the table starts at index 0.
+    dealer = transitions[pop()]
+    dealerUpcard = pop()
+    dealer = transitions[dealer * 12 + dealerUpcard]
+    player = transitions[transitions[pop()] * 12 + pop()]
+
+    # Handle player actions, a total of 21 always stands:
+    bet = 1
+    while player < 42:  # A total under 21.
+        move = policy(player >> 1, player & 1 == 1, dealerUpcard, canDouble)
+        if moves is not None:
+            moves.append(move)
+        if move == 'S':
+            break
+        if move == 'D' and not canDouble:
+            raise ValueError('policy doubled down when it was not allowed')
+        player = transitions[player * 12 + pop()]
+        if move == 'D':
+            bet = 2
+            break
+        canDouble = False
+
+    total = player >> 1
+    if total > 21:
+        return -bet, True, False
+
+    # Handle the dealer's actions:
+    while dealer < 34:  # A total under 17.
+        dealer = transitions[dealer * 12 + pop()]
+
+    dealerTotal = dealer >> 1
+    if dealerTotal > 21 or total > dealerTotal:
+        return bet, False, dealerTotal > 21
+    if total < dealerTotal:
+        return -bet, False, False
+    return 0, False, False
+
+
+def simulate(policy, numHands, seed=None, numDecks=NUM_DECKS, penetration=PENETRATION,
+             byCount=None):
+    """Play numHands hands with policy from a shoe of numDecks decks that
+    is reshuffled at the cut card, like main() does, and return a
+    SimulationResult.
+
+    If a byCount dict is given, the shoe keeps a Hi-Lo count (see
+    blackjack.CardCounter) and byCount[trueCount] is set to [hands,
+    result] for the hands started at each true count (rounded)."""
+    counter = CardCounter(numDecks) if byCount is not None else None
+    shoe = Shoe(numDecks, penetration, DECK_POINTS, random.Random(seed), counter)
+    totalResult = wins = pushes = playerBusts = dealerBusts = 0
+
+    for i in range(numHands):
+        if shoe.needsShuffle():
+            shoe.shuffle()
+        if counter is not None:
+            trueCount = round(counter.getTrueCount())
+        result, playerBust, dealerBust = playHand(policy, shoe)
+        if counter is not None:
+            countResult = byCount.setdefault(trueCount, [0, 0])
+            countResult[0] += 1
+            countResult[1] += result
+        totalResult += result
+        if result > 0:
+            wins += 1
+        elif result == 0:
+            pushes += 1
+        playerBusts += playerBust
+        dealerBusts += dealerBust
+
+    return SimulationResult(numHands, totalResult / numHands, wins / numHands,
+        pushes / numHands, (numHands - wins - pushes) / numHands,
+        playerBusts / numHands, dealerBusts / numHands)
+
+
+def flatBet(money, baseBet, lastResult, startingMoney):
+    """Always bet baseBet."""
+    return baseBet
+
+
+def martingaleBet(money, baseBet, lastResult, startingMoney):
+    """Double the bet after every loss, go back to baseBet after a win or tie."""
+    return baseBet if lastResult is None or lastResult[1] >= 0 else 2 * lastResult[0]
+
+
+def proportionalBet(money, baseBet, lastResult, startingMoney):
+    """Bet the same share of the bankroll as baseBet was of the starting
+    money, so the first bet is baseBet."""
+    return max(1, money * baseBet // startingMoney)
+
+
+BET_POLICIES = {
+    'flat': flatBet,
+    'martingale': martingaleBet,
+    'proportional': proportionalBet,
+}
+
+
+def playSession(policy, betPolicy, shoe, money, baseBet, maxHands):
+    """Play hands from shoe until the player is broke or has played
+    maxHands hands. Returns (handsPlayed, finalMoney)."""
+    startingMoney = money
+    lastResult = None   # (bet, result) of the previous hand
+    for hand in range(maxHands):
+        if money <= 0:
+            return hand, money
+        if shoe.needsShuffle():
+            shoe.shuffle()
+        bet = min(money, max(1, betPolicy(money, baseBet, lastResult, startingMoney)))
+        result, playerBust, dealerBust = playHand(policy, shoe, 2 * bet <= money)
+        money += bet * result
+        lastResult = (bet, result)
+    return maxHands, money
+
+
+def simulateBankrollShard(policyName, betPolicyName, numSessions, money, baseBet,
+                          maxHands, numDecks, penetration, seed, shard):
+    """Play numSessions sessions with the shard's own random stream and
+    return (ruined, totalMoney, lengthCounts, bankrollCounts), counting
+    session lengths and final bankrolls (by BANKROLL_BUCKET) instead of
+    keeping each one."""
+    rng = random.Random(f'{seed}-{shard}')
+    shoe = Shoe(numDecks, penetration, DECK_POINTS, rng)
+    policy = POLICIES[policyName]
+    betPolicy = BET_POLICIES[betPolicyName]
+    ruined = totalMoney = 0
+    lengthCounts = Counter()
+    bankrollCounts = Counter()
+
+    for session in range(numSessions):
+        shoe.shuffle()  # Every session starts at a fresh shoe.
+        hands, finalMoney = playSession(policy, betPolicy, shoe, money, baseBet, maxHands)
+        ruined += finalMoney <= 0
+        totalMoney += finalMoney
+        lengthCounts[hands] += 1
+        bankrollCounts[finalMoney // BANKROLL_BUCKET] += 1
+
+    return ruined, totalMoney, lengthCounts, bankrollCounts
+
+
+def getPercentile(counts, fraction):
+    """Returns the value below which fraction of the counted values fall."""
+    wanted = fraction * sum(counts.values())
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if seen >= wanted:
+            return value
+
+
+def simulateBankrolls(policyName, betPolicyName, numSessions, money=STARTING_MONEY,
+                      baseBet=100, maxHands=1000, numDecks=NUM_DECKS,
+                      penetration=PENETRATION, workers=None, seed=None):
+    """Play numSessions independent sessions of up to maxHands hands each,
+    starting with money, split across a pool of worker processes. Policies
+    are given by name (see POLICIES and BET_POLICIES) so they can be sent
+    to the workers. Returns a BankrollResult.
+
+    A seed replays the same sessions, and so the same bankrolls, with
+    any number of workers; seed=None draws a fresh one."""
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    shards = [min(SESSIONS_PER_SHARD, numSessions - start)
+              for start in range(0, numSessions, SESSIONS_PER_SHARD)]
+    shardArgs = [(policyName, betPolicyName, size, money, baseBet, maxHands,
+                  numDecks, penetration, seed, shard) for shard, size in enumerate(shards)]
+
+    if workers == 1 or len(shards) == 1:
+        summaries = [simulateBankrollShard(*args) for args in shardArgs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as pool:
+            summaries = list(pool.map(simulateBankrollShard, *zip(*shardArgs)))
+
+    # Merge the per-shard summaries:
+    ruined = totalMoney = 0
+    lengthCounts = Counter()
+    bankrollCounts = Counter()
+    for shardRuined, shardMoney, shardLengths, shardBankrolls in summaries:
+        ruined += shardRuined
+        totalMoney += shardMoney
+        lengthCounts.update(shardLengths)
+        bankrollCounts.update(shardBankrolls)
+
+    percentiles = {percent: getPercentile(bankrollCounts, percent / 100) * BANKROLL_BUCKET
+                   for percent in (5, 25, 50, 75, 95)}
+    return BankrollResult(numSessions, ruined / numSessions,
+        getPercentile(lengthCounts, 0.5), totalMoney / numSessions, percentiles)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Headless Blackjack strategy simulator.')
+    parser.add_argument('-p', '--policy', choices=sorted(POLICIES) + ['solved'], default='basic',
+        help='playing policy, solved uses blackjack_solver.py (default: basic)')
+    parser.add_argument('-n', '--hands', type=int, default=1_000_000,
+        help='number of hands to play, per session with --sessions (default: 1,000,000)')
+    parser.add_argument('-s', '--seed', type=int, help='seed for reproducible runs')
+    parser.add_argument('-d', '--decks', type=int, default=NUM_DECKS,
+        help=f'number of decks in the shoe (default: {NUM_DECKS})')
+    parser.add_argument('--penetration', type=float, default=PENETRATION,
+        help=f'fraction of the shoe dealt before reshuffling (default: {PENETRATION})')
+    parser.add_argument('--sessions', type=int,
+        help='simulate this many bankroll sessions of up to --hands hands each')
+    parser.add_argument('-b', '--bet-policy', choices=sorted(BET_POLICIES), default='flat',
+        help='betting policy for --sessions (default: flat)')
+    parser.add_argument('--bankroll', type=int, default=STARTING_MONEY,
+        help=f'starting money for --sessions (default: {STARTING_MONEY})')
+    parser.add_argument('--base-bet', type=int, default=100,
+        help='base bet for --sessions (default: 100)')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+        help='number of worker processes for --sessions (default: 1)')
+    parser.add_argument('--by-count', action='store_true',
+        help='also show the results by the Hi-Lo true count at the start of each hand')
+    args = parser.parse_args(argv)
+    if args.hands < 1:
+        parser.error('--hands must be positive')
+    if args.decks < 1 or not 0 < args.penetration <= 1:
+        parser.error('--decks must be positive and --penetration between 0 and 1')
+
+    if args.sessions is not None:
+        if args.policy == 'solved':
+            parser.error('--sessions needs one of the built in policies')
+        if args.sessions < 1 or args.workers < 1 or args.bankroll < 1 or args.base_bet < 1:
+            parser.error('--sessions, --workers, --bankroll and --base-bet must be positive')
+        result = simulateBankrolls(args.policy, args.bet_policy, args.sessions, args.bankroll,
+            args.base_bet, args.hands, args.decks, args.penetration, args.workers, args.seed)
+        print(f'Policy: {args.policy}, betting: {args.bet_policy}, {result.sessions} sessions '
+              f'of up to {args.hands} hands starting with ${args.bankroll}')
+        print(f'Risk of ruin: {result.riskOfRuin:.2%}, median session length: {result.medianLength} hands')
+        print(f'Mean final bankroll: ${result.meanBankroll:,.0f}')
+        print('Final bankroll percentiles: ' + ', '.join(
+            f'{percent}%: ${value:,}' for percent, value in result.bankrollPercentiles.items()))
+        return
+
+    if args.policy == 'solved':
+        table = blackjack_solver.solveStrategy(args.decks)
+        policy = blackjack_solver.makeTablePolicy(table)
+    else:
+        policy = POLICIES[args.policy]
+
+    start = time.perf_counter()
+    byCount = {} if args.by_count else None
+    result = simulate(policy, args.hands, args.seed, args.decks, args.penetration, byCount)
+    elapsed = time.perf_counter() - start
+
+    print(f'Policy: {args.policy}, {result.hands} hands ({result.hands / elapsed:,.0f} hands/sec)')
+    print(f'Expected value per hand: {result.expectedValue:+.4f} bets')
+    print(f'Won {result.winRate:.2%}, tied {result.pushRate:.2%}, lost {result.lossRate:.2%}')
+    print(f'Player busts: {result.playerBustRate:.2%}, dealer busts: {result.dealerBustRate:.2%}')
+    if byCount is not None:
+        print('True count    Hands  Expected value per hand')
+        for trueCount in sorted(byCount):
+            hands, countResult = byCount[trueCount]
+            print(f'{trueCount:>+10} {hands:>8} {countResult / hands:>+24.4f}')
+
+
+# If the program is run (instead of imported), run the simulator:
+if __name__ == '__main__':
+    main()
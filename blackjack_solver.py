@@ -0,0 +1,237 @@
+"""
+Blackjack Strategy Solver, by Emmanuel Munyite
+Works out the best move (Hit, Stand or Double down) for every player
+total against every dealer upcard, under the rules of blackjack.py: the
+dealer stands at 17, double down only on the first two cards, and no
+splitting or insurance.
+
+The expected value of each move is found by recursion over the cards
+left in the shoe, so every card the player and dealer draw is taken out
+of the shoe before the next one. A shoe is kept as a tuple of how many
+cards of each points value (2 to 11) are left, and every result is
+cached by hand and shoe, so the many different orders of drawing the
+same cards are only worked out once.
+
+Tags: large, game, card game, math
+"""
+
+import argparse
+import time
+from functools import lru_cache, partial
+
+import blackjack
+from blackjack import EMPTY_HAND, NUM_DECKS, addCard, getTotal, isSoft
+
+
+#   The points values of the cards, index i of a shoe tuple counts the
+#   cards worth POINTS[i]:
+POINTS = tuple(range(2, 12))
+
+#   Rows of the strategy table: every two card total, hard and soft
+HARD_TOTALS = tuple(range(5, 21))
+SOFT_TOTALS = tuple(range(12, 22))
+UPCARDS = POINTS
+
+MOVE_NAMES = {'H': 'Hit', 'S': 'Stand', 'D': 'Double down'}
+
+
+def getFullShoe(numDecks=NUM_DECKS):
+    """Returns the shoe tuple for numDecks full decks."""
+    return tuple(numDecks * (16 if points == 10 else 4) for points in POINTS)
+
+
+def removeCard(shoe, points):
+    """Returns the shoe with one card worth points taken out."""
+    i = points - 2
+    return shoe[:i] + (shoe[i] - 1,) + shoe[i + 1:]
+
+
+@lru_cache(maxsize=None)
+def getDealerOdds(dealerHand, shoe):
+    """Returns the chances of the dealer, holding dealerHand, finishing on
+    17, 18, 19, 20, 21 or busting, drawing from shoe."""
+    odds = [0.0] * 6
+    cardsLeft = sum(shoe)
+    for i, count in enumerate(shoe):
+        if not count:
+            continue
+        chance = count / cardsLeft
+        nextHand = addCard(dealerHand, POINTS[i])
+        total = getTotal(nextHand)
+        if total > 21:
+            odds[5] += chance
+        elif total >= 17:
+            odds[total - 17] += chance
+        else:
+            nextOdds = getDealerOdds(nextHand, shoe[:i] + (count - 1,) + shoe[i + 1:])
+            for outcome in range(6):
+                odds[outcome] += chance * nextOdds[outcome]
+    return tuple(odds)
+
+
+def getStandValue(total, upcard, shoe):
+    """Returns the expected value of standing on total against upcard."""
+    odds = getDealerOdds(addCard(EMPTY_HAND, upcard), shoe)
+    value = odds[5]  # The dealer busts.
+    for dealerTotal, chance in zip(range(17, 22), odds):
+        if total > dealerTotal:
+            value += chance
+        elif total < dealerTotal:
+            value -= chance
+    return value
+
+
+@lru_cache(maxsize=None)
+def getBestValue(hand, upcard, shoe):
+    """Returns the expected value of playing hand on (without doubling)
+    with the best of hitting and standing."""
+    total = getTotal(hand)
+    if total > 21:
+        return -1.0
+    standValue = getStandValue(total, upcard, shoe)
+    if total == 21:
+        return standValue
+    return max(standValue, getHitValue(hand, upcard, shoe))
+
+
+def getHitValue(hand, upcard, shoe):
+    """Returns the expected value of taking one card and then playing on."""
+    value = 0.0
+    cardsLeft = sum(shoe)
+    for i, count in enumerate(shoe):
+        if count:
+            value += count / cardsLeft * getBestValue(
+                addCard(hand, POINTS[i]), upcard, shoe[:i] + (count - 1,) + shoe[i + 1:])
+    return value
+
+
+def getDoubleValue(hand, upcard, shoe):
+    """Returns the expected value of doubling down: twice the bet, one card."""
+    value = 0.0
+    cardsLeft = sum(shoe)
+    for i, count in enumerate(shoe):
+        if count:
+            nextHand = addCard(hand, POINTS[i])
+            total = getTotal(nextHand)
+            if total > 21:
+                value -= count / cardsLeft
+            else:
+                value += count / cardsLeft * getStandValue(
+                    total, upcard, shoe[:i] + (count - 1,) + shoe[i + 1:])
+    return 2 * value
+
+
+def getStartingHands(total, soft):
+    """Returns the pairs of points values that make a two card hand of
+    total (soft or hard)."""
+    pairs = []
+    for first in POINTS:
+        for second in POINTS[first - 2:]:
+            hand = addCard(addCard(EMPTY_HAND, first), second)
+            if getTotal(hand) == total and isSoft(hand) == soft:
+                pairs.append((first, second))
+    return pairs
+
+
+def solveStrategy(numDecks=NUM_DECKS):
+    """Returns the strategy table for a shoe of numDecks decks, a dict
+    mapping (total, isSoft, upcard) to (firstMove, laterMove). firstMove
+    is the best of 'H', 'S' and 'D' on the first two cards, laterMove the
+    best of 'H' and 'S' after that.
+
+    Each row averages the expected values over every pair of cards that
+    make up its total, weighted by how likely that pair is to be dealt
+    from the shoe."""
+    fullShoe = getFullShoe(numDecks)
+    table = {}
+
+    for soft, totals in ((False, HARD_TOTALS), (True, SOFT_TOTALS)):
+        for total in totals:
+            for upcard in UPCARDS:
+                values = {'H': 0.0, 'S': 0.0, 'D': 0.0}
+                for first, second in getStartingHands(total, soft):
+                    shoe = removeCard(fullShoe, upcard)
+                    weight = shoe[first - 2] / sum(shoe)
+                    shoe = removeCard(shoe, first)
+                    weight *= shoe[second - 2] / sum(shoe) * (1 if first == second else 2)
+                    shoe = removeCard(shoe, second)
+                    if min(shoe) < 0 or weight == 0:
+                        continue    # Not enough of these cards in the shoe.
+
+                    hand = addCard(addCard(EMPTY_HAND, first), second)
+                    values['H'] += weight * getHitValue(hand, upcard, shoe)
+                    values['S'] += weight * getStandValue(total, upcard, shoe)
+                    values['D'] += weight * getDoubleValue(hand, upcard, shoe)
+
+                firstMove = max(values, key=values.get)
+                laterMove = 'H' if values['H'] > values['S'] else 'S'
+                table[total, soft, upcard] = (firstMove, laterMove)
+
+    getDealerOdds.cache_clear()
+    getBestValue.cache_clear()
+    return table
+
+
+def getTableMove(table, total, soft, upcard, canDouble):
+    """Returns the table's move for a hand, 'H', 'S' or 'D'. Totals that
+    are not in the table (small hard totals, 21) hit or stand."""
+    moves = table.get((total, soft, upcard))
+    if moves is None:
+        return 'H' if total < 12 else 'S'
+    return moves[0] if canDouble else moves[1]
+
+
+def makeTablePolicy(table):
+    """Returns a blackjack_sim policy that plays by table."""
+    def tablePolicy(total, isSoft, dealerUpcard, canDouble):
+        return getTableMove(table, total, isSoft, dealerUpcard, canDouble)
+    return tablePolicy
+
+
+def getHint(table, playerHand, dealerHand, canDouble):
+    """Returns the name of the table's move for the game's (rank, suit)
+    hands in blackjack.py, using the dealer's face up card."""
+    hand = EMPTY_HAND
+    for card in playerHand:
+        hand = blackjack.addRankedCard(hand, card)
+    upcard = blackjack.RANK_POINTS[dealerHand[1][0]]
+    return MOVE_NAMES[getTableMove(table, getTotal(hand), isSoft(hand), upcard, canDouble)]
+
+
+def displayTable(table):
+    """Print the table as a chart, one row per total and one column per upcard."""
+    print('        ' + ' '.join(f'{"A" if upcard == 11 else upcard:>2}' for upcard in UPCARDS))
+    for soft, totals in ((False, HARD_TOTALS), (True, SOFT_TOTALS)):
+        for total in totals:
+            label = f'{"Soft" if soft else "Hard"} {total}'
+            moves = (table[total, soft, upcard][0] for upcard in UPCARDS)
+            print(f'{label:<8}' + ' '.join(f'{move:>2}' for move in moves))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Blackjack basic strategy solver.')
+    parser.add_argument('-d', '--decks', type=int, default=NUM_DECKS,
+        help=f'number of decks in the shoe (default: {NUM_DECKS})')
+    parser.add_argument('--play', action='store_true',
+        help='play blackjack.py with hints from the solved table')
+    parser.add_argument('--count', action='store_true',
+        help='with --play, also show the Hi-Lo count and live odds before each move')
+    args = parser.parse_args(argv)
+    if args.decks < 1:
+        parser.error('--decks must be positive')
+
+    start = time.perf_counter()
+    table = solveStrategy(args.decks)
+    print(f'Solved the strategy for {args.decks} decks in {time.perf_counter() - start:.1f} seconds.')
+    print('H = Hit, S = Stand, D = Double down (on the first two cards)')
+    displayTable(table)
+
+    if args.play:
+        counter = blackjack.CardCounter(args.decks) if args.count else None
+        blackjack.main(hints=partial(getHint, table), shoe=blackjack.Shoe(args.decks),
+                       counter=counter)
+
+
+# If the program is run (instead of imported), run the solver:
+if __name__ == '__main__':
+    main()